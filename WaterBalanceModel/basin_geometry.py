@@ -0,0 +1,194 @@
+"""
+Basin polygons prepared once per shapefile and raster grid: reprojected to
+the grid's CRS, repaired, simplified below the pixel size and rasterized to
+fractional coverage weights. Results are cached as GeoParquet plus the
+sparse weight matrix, keyed by the shapefile content and the grid spec.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from scipy import sparse
+
+from WaterBalanceModel.zonal_stats import ZonalWeights, build_zonal_weights
+
+# Files that make up a shapefile besides the .shp itself
+_SHAPEFILE_SIDECARS = ('.shx', '.dbf', '.prj', '.cpg')
+
+
+@dataclass
+class PreparedBasins:
+    """
+    Basins ready for zonal statistics on one grid.
+
+    Attributes:
+        basins: gpd.GeoDataFrame - Valid, simplified polygons in the grid CRS
+        weights: ZonalWeights - Fractional coverage of each basin on the grid
+        key: str - Cache key (shapefile content + grid spec + options)
+    """
+    basins: gpd.GeoDataFrame
+    weights: ZonalWeights
+    key: str
+
+
+def grid_spec(raster_path: str) -> dict:
+    """
+    CRS, transform and size of a raster, enough to tell two grids apart
+    """
+    import rasterio
+
+    with rasterio.open(raster_path) as src:
+        return {
+            'crs': src.crs.to_wkt(),
+            'transform': list(src.transform)[:6],
+            'width': src.width,
+            'height': src.height
+        }
+
+
+def _shapefile_hash(path: str) -> str:
+    """
+    SHA-256 over a vector file and, for shapefiles, its sidecar files
+    """
+    paths = [path]
+    stem, ext = os.path.splitext(path)
+    if ext.lower() == '.shp':
+        paths += [stem + sidecar for sidecar in _SHAPEFILE_SIDECARS if os.path.exists(stem + sidecar)]
+
+    sha = hashlib.sha256()
+    for p in paths:
+        sha.update(os.path.basename(p).encode())
+        with open(p, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+
+    return sha.hexdigest()
+
+
+def _polygonal(geom):
+    """
+    Repair a geometry and keep only its polygonal parts (Polygon or MultiPolygon)
+    """
+    if geom is None or geom.is_empty:
+        return geom
+    geom = shapely.make_valid(geom)
+    if geom.geom_type == 'GeometryCollection':
+        parts = [g for g in shapely.get_parts(geom) if g.geom_type in ('Polygon', 'MultiPolygon')]
+        geom = shapely.union_all(parts) if parts else shapely.Polygon()
+    return geom
+
+
+def clean_basins(basins: gpd.GeoDataFrame, crs, tolerance: float = 0.0) -> gpd.GeoDataFrame:
+    """
+    Reproject, repair and simplify basins. MultiPolygons stay one row per basin.
+
+    Parameters:
+        crs - Target CRS
+        tolerance: float - Simplification tolerance in target CRS units,
+            topology is preserved so parts and holes are not dropped
+    """
+    basins = basins.to_crs(crs)
+    geometry = basins.geometry.apply(_polygonal)
+    if tolerance > 0:
+        geometry = geometry.simplify(tolerance, preserve_topology=True)
+    return basins.set_geometry(geometry)
+
+
+def _save(prepared: PreparedBasins, id_col: str, out_dir: str):
+    weights = prepared.weights
+    prepared.basins.to_parquet(os.path.join(out_dir, 'basins.parquet'))
+    sparse.save_npz(os.path.join(out_dir, 'weights.npz'), weights.matrix)
+    with open(os.path.join(out_dir, 'grid.json'), 'w') as f:
+        json.dump({
+            'id_col': id_col,
+            'window': [int(weights.window.col_off), int(weights.window.row_off),
+                       int(weights.window.width), int(weights.window.height)],
+            'transform': list(weights.transform)[:6],
+            'shape': list(weights.shape),
+            'crs': weights.crs
+        }, f)
+
+
+def _load(cache_dir: str, key: str) -> PreparedBasins:
+    from affine import Affine
+    from rasterio.windows import Window
+
+    with open(os.path.join(cache_dir, 'grid.json')) as f:
+        grid = json.load(f)
+    basins = gpd.read_parquet(os.path.join(cache_dir, 'basins.parquet'))
+
+    weights = ZonalWeights(
+        matrix=sparse.load_npz(os.path.join(cache_dir, 'weights.npz')).tocsr(),
+        basin_ids=basins[grid['id_col']].to_numpy(),
+        window=Window(*grid['window']),
+        transform=Affine(*grid['transform']),
+        shape=tuple(grid['shape']),
+        crs=grid['crs']
+    )
+
+    return PreparedBasins(basins=basins, weights=weights, key=key)
+
+
+def prepare_basins(
+    basins_path: str,
+    raster_path: str,
+    cache_dir: str,
+    id_col: str = 'Site_ID',
+    simplify_pixels: float = 0.1
+) -> PreparedBasins:
+    """
+    Basins reprojected, simplified and rasterized onto a raster's grid, cached.
+
+    The cache entry is reused as long as the shapefile content, the grid
+    (CRS, transform, size) and the options are unchanged, so later sessions
+    skip reprojection and coverage computation entirely.
+
+    Parameters:
+        basins_path: str - Basin polygons (e.g. Final_Basins.shp)
+        raster_path: str - Any raster on the target grid (e.g. one PRISM day)
+        cache_dir: str - Holds one subdirectory per cache key
+        id_col: str - Column identifying each basin
+        simplify_pixels: float - Simplification tolerance as a fraction of
+            the pixel size, small enough not to move coverage fractions
+    """
+    spec = grid_spec(raster_path)
+    key = hashlib.sha256(json.dumps({
+        'basins': _shapefile_hash(basins_path),
+        'grid': spec,
+        'id_col': id_col,
+        'simplify_pixels': simplify_pixels
+    }, sort_keys=True).encode()).hexdigest()[:16]
+
+    entry_dir = os.path.join(cache_dir, key)
+    if os.path.exists(entry_dir):
+        return _load(entry_dir, key)
+
+    pixel = min(abs(spec['transform'][0]), abs(spec['transform'][4]))
+    basins = clean_basins(gpd.read_file(basins_path), spec['crs'], tolerance=simplify_pixels * pixel)
+    prepared = PreparedBasins(
+        basins=basins,
+        weights=build_zonal_weights(basins, raster_path, id_col=id_col),
+        key=key
+    )
+
+    # Written beside the final path and moved in, so a partial write is never read
+    partial_dir = entry_dir + '.partial'
+    shutil.rmtree(partial_dir, ignore_errors=True)
+    os.makedirs(partial_dir)
+    _save(prepared, id_col, partial_dir)
+    os.replace(partial_dir, entry_dir)
+
+    return prepared
+
+
+def coverage_masks(prepared: PreparedBasins) -> np.ndarray:
+    """
+    Dense (basins, rows, cols) coverage weights over the grid window, for plotting
+    """
+    return prepared.weights.matrix.toarray().reshape((-1,) + tuple(prepared.weights.shape))
@@ -0,0 +1,222 @@
+"""
+Multi-site h_crit runs. The stage table is partitioned once by Site_ID in
+the parent process and its numeric columns are placed in shared memory, so
+each worker reads its site's contiguous slice without the table being
+pickled to every process.
+"""
+
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from WaterBalanceModel.profiling import NULL_PROFILER, Profiler
+from WaterBalanceModel.wetland_model import WetlandModel
+
+# Per-worker views onto the shared stage arrays, set by _attach_shared
+_SHARED = {}
+
+
+def _share_arrays(arrays: dict):
+    """
+    Copy named 1-D arrays into one shared memory block.
+
+    Returns:
+        shm: SharedMemory - The block, to be closed and unlinked by the caller
+        layout: dict - name -> (dtype str, offset, length) to rebuild views
+    """
+    layout = {}
+    offset = 0
+    for name, values in arrays.items():
+        # 8-byte alignment keeps every view naturally aligned
+        offset = -(-offset // 8) * 8
+        layout[name] = (values.dtype.str, offset, len(values))
+        offset += values.nbytes
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, values in arrays.items():
+        dtype, start, length = layout[name]
+        np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=start)[:] = values
+
+    return shm, layout
+
+
+def _attach_shared(shm_name: str, layout: dict):
+    """
+    Worker initializer: map the shared stage arrays into this process
+    """
+    # Pool workers share the parent's resource tracker, the parent unlinks
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _SHARED['shm'] = shm
+    for name, (dtype, start, length) in layout.items():
+        _SHARED[name] = np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=start)
+
+
+def _recession_slope_summary(recession_ci) -> dict:
+    """
+    Slope of the recession rate vs. stage line and its bootstrap bounds
+    (NaN without replicates)
+    """
+    if recession_ci is None:
+        return {'recession_slope': np.nan, 'recession_slope_lower': np.nan, 'recession_slope_upper': np.nan}
+
+    slope = recession_ci.ci.loc['slope']
+    return {
+        'recession_slope': slope['estimate'],
+        'recession_slope_lower': slope['lower'],
+        'recession_slope_upper': slope['upper']
+    }
+
+
+def _site_hcrit(
+    site_id: str,
+    start: int,
+    stop: int,
+    hcrit_kwargs: dict,
+    profile: bool = False
+):
+    """
+    Worker task: run WetlandModel.calc_hcrit on one site's slice
+    """
+    profiler = Profiler(site_id) if profile else NULL_PROFILER
+
+    with profiler.phase('shared_slice'):
+        stage = pd.DataFrame({
+            'Date': _SHARED['Date'][start:stop].view('datetime64[ns]'),
+            'Site_ID': site_id,
+            'water_level': _SHARED['water_level'][start:stop],
+            'flag': 0
+        })
+
+    wbm = WetlandModel(
+        stage_df=stage,
+        Site_ID=site_id,
+        source_dem_path='TBD',
+        profiler=profiler
+    )
+    wbm.calc_hcrit(method='hydrograph', plot=False, **hcrit_kwargs)
+    result = wbm.hcrit_result
+
+    summary = {
+        'Site_ID': site_id,
+        'n_obs': stop - start,
+        'start_date': stage['Date'].iloc[0] if len(stage) else pd.NaT,
+        'end_date': stage['Date'].iloc[-1] if len(stage) else pd.NaT,
+        'n_nights': len(result.nights),
+        'n_fitted_nights': int(result.nights['slope'].notna().sum()),
+        'n_recession_days': len(result.daily_wl),
+        'h_crit': result.h_crit,
+        'h_crit_lower': result.h_crit_ci[0],
+        'h_crit_upper': result.h_crit_ci[1],
+        **_recession_slope_summary(result.recession_ci)
+    }
+
+    daily_wl = result.daily_wl.copy()
+    daily_wl.insert(0, 'Site_ID', site_id)
+
+    return summary, daily_wl, profiler.report() if profile else None
+
+
+def partition_stage(stage_df: pd.DataFrame):
+    """
+    Keep unflagged rows and order them by Site_ID then Date in one pass.
+
+    Returns:
+        stage: pd.DataFrame - Date, Site_ID and water_level, site-contiguous
+        bounds: dict - Site_ID -> (start, stop) row range within stage
+    """
+    stage = stage_df.loc[stage_df['flag'] == 0, ['Date', 'Site_ID', 'water_level']]
+
+    site_codes, sites = pd.factorize(stage['Site_ID'], sort=True)
+    dates = stage['Date'].to_numpy(dtype='datetime64[ns]')
+    order = np.lexsort((dates, site_codes))
+    stage = stage.iloc[order].reset_index(drop=True)
+
+    edges = np.searchsorted(site_codes[order], np.arange(len(sites) + 1))
+    bounds = {
+        site: (int(edges[i]), int(edges[i + 1]))
+        for i, site in enumerate(sites)
+    }
+
+    return stage, bounds
+
+
+def run_hcrit_batch(
+    stage_df: pd.DataFrame,
+    evening_cut: int,
+    morning_cut: int,
+    stage_filter: float,
+    site_ids: list = None,
+    engine: str = "vectorized",
+    max_workers: int = None,
+    profile: bool = False,
+    n_boot: int = 0
+):
+    """
+    Run the hydrograph h_crit method for every well on a process pool.
+
+    Parameters:
+        stage_df: pd.DataFrame - Full stage table (Date, Site_ID,
+            water_level, flag) for any number of wells
+        site_ids: list - Wells to run, defaults to every Site_ID present
+        max_workers: int - Pool size, defaults to the number of CPUs
+        profile: bool - Profile every site's phases (see profiling)
+        n_boot: int - Bootstrap replicates of each well's h_crit and
+            recession_slope bounds, as in calc_wetland_hcrit. 0, the default,
+            leaves them NaN; 1000 replicates add about 0.1 s for a well
+            with 300 recession days
+
+    Returns:
+        summary: pd.DataFrame - One row per well
+        daily_wl: pd.DataFrame - Filtered daily_wl of every well, with Site_ID
+        reports: list - Each site's Profiler.report() when profile is set
+            (combine with profiling.aggregate_reports), None otherwise
+    """
+    stage, bounds = partition_stage(stage_df)
+    if site_ids is not None:
+        bounds = {site: bounds[site] for site in site_ids if site in bounds}
+
+    hcrit_kwargs = {
+        'evening_cut': evening_cut,
+        'morning_cut': morning_cut,
+        'stage_filter': stage_filter,
+        'engine': engine,
+        'n_boot': n_boot
+    }
+
+    shm, layout = _share_arrays({
+        'Date': stage['Date'].to_numpy(dtype='datetime64[ns]').view('int64'),
+        'water_level': stage['water_level'].to_numpy(dtype='float64')
+    })
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_attach_shared,
+            initargs=(shm.name, layout)
+        ) as executor:
+            # Largest sites first so a long record doesn't finish last
+            ordered = sorted(bounds.items(), key=lambda item: item[1][0] - item[1][1])
+            futures = [
+                executor.submit(_site_hcrit, site, start, stop, hcrit_kwargs, profile)
+                for site, (start, stop) in ordered
+            ]
+            outputs = [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    summary = pd.DataFrame(
+        [site_summary for site_summary, _, _ in outputs],
+        columns=['Site_ID', 'n_obs', 'start_date', 'end_date', 'n_nights',
+                 'n_fitted_nights', 'n_recession_days', 'h_crit', 'h_crit_lower', 'h_crit_upper',
+                 'recession_slope', 'recession_slope_lower', 'recession_slope_upper']
+    ).sort_values('Site_ID', ignore_index=True)
+
+    daily_frames = [site_daily for _, site_daily, _ in outputs]
+    daily_wl = pd.concat(daily_frames, ignore_index=True) if daily_frames else pd.DataFrame()
+
+    reports = [report for _, _, report in outputs] if profile else None
+
+    return summary, daily_wl, reports
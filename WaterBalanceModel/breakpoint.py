@@ -0,0 +1,190 @@
+"""
+h_crit from the stage vs. night-recession scatter. Above the spill stage
+the recession steepens with stage, so a two-segment linear fit of slope on
+stage puts h_crit at the break. With the points sorted by stage, prefix
+sums of x, y, x², xy and y² give the least-squares error of both segments
+for every candidate break at once (O(n) after the sort), and block-bootstrap
+replicates are scanned the same way as rows of one 2-D array.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from WaterBalanceModel.recession_bootstrap import block_bootstrap_indices, default_block_length
+
+# Fewest days on either side of a break, so each segment has a slope
+MIN_SEGMENT = 3
+
+
+@dataclass
+class BreakpointFit:
+    """
+    Two-segment fit of recession slope against daily stage.
+
+    Attributes:
+        h_crit: float - Stage of the break, halfway between the two points
+            it separates
+        lower, upper: float - Percentile bootstrap bounds of h_crit (NaN
+            without replicates)
+        level: float - Confidence level of the bounds
+        left, right: tuple - (intercept, slope) of the segment below and
+            above the break
+        n_left, n_right: int - Days in each segment
+        sse: float - Residual sum of squares of the fit
+        replicates: np.ndarray - Bootstrap h_crit estimates
+    """
+    h_crit: float
+    lower: float
+    upper: float
+    level: float
+    left: tuple
+    right: tuple
+    n_left: int
+    n_right: int
+    sse: float
+    replicates: np.ndarray
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    # Cumulative sums along axis 1 with a leading column of zeros
+    return np.concatenate([np.zeros((values.shape[0], 1)), np.cumsum(values, axis=1)], axis=1)
+
+
+def _segment_sse(n, sx, sy, sxx, sxy, syy):
+    """
+    Least-squares residual of a line through a segment from its sums
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ssx = sxx - sx * sx / n
+        ssy = syy - sy * sy / n
+        ssxy = sxy - sx * sy / n
+        # A segment of equal stages fits its mean
+        sse = np.where(ssx > 0, ssy - ssxy * ssxy / ssx, ssy)
+
+    return np.maximum(sse, 0.0)
+
+
+def split_sse(x: np.ndarray, y: np.ndarray, min_segment: int = MIN_SEGMENT) -> np.ndarray:
+    """
+    Two-segment residual sum of squares for every break of every row.
+
+    Parameters:
+        x, y: np.ndarray - (rows, n) points, each row sorted by x
+
+    Returns:
+        np.ndarray: (rows, n + 1); entry k splits each row into its first k
+            points and the rest, inf where a segment would be shorter than
+            min_segment or the break would fall between equal stages
+    """
+    # Centred so the prefix sums don't lose the small recession rates
+    x = x - x.mean(axis=1, keepdims=True)
+    y = y - y.mean(axis=1, keepdims=True)
+
+    sums = [_prefix(values) for values in (x, y, x * x, x * y, y * y)]
+    totals = [s[:, -1:] for s in sums]
+
+    n = x.shape[1]
+    k = np.arange(n + 1)
+    left = _segment_sse(k, *sums)
+    right = _segment_sse(n - k, *(total - s for total, s in zip(totals, sums)))
+    sse = left + right
+
+    valid = (k >= min_segment) & (k <= n - min_segment)
+    valid = valid & np.concatenate([
+        np.zeros((x.shape[0], 1), dtype=bool),
+        np.diff(x, axis=1) > 0,
+        np.zeros((x.shape[0], 1), dtype=bool)
+    ], axis=1)
+
+    return np.where(valid, sse, np.inf)
+
+
+def _best_breaks(x: np.ndarray, y: np.ndarray, min_segment: int):
+    """
+    Best break index and h_crit of every (sorted) row, NaN where no break is valid
+    """
+    sse = split_sse(x, y, min_segment)
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(x.shape[0])
+    found = np.isfinite(sse[rows, best])
+
+    inner = np.clip(best, 1, x.shape[1] - 1)
+    h_crit = np.where(found, (x[rows, inner - 1] + x[rows, inner]) / 2, np.nan)
+
+    return best, h_crit, sse[rows, best]
+
+
+def _line(x: np.ndarray, y: np.ndarray) -> tuple:
+    dx = x - x.mean()
+    slope = (dx * (y - y.mean())).sum() / (dx * dx).sum() if (dx != 0).any() else 0.0
+    return float(y.mean() - slope * x.mean()), float(slope)
+
+
+def fit_breakpoint(
+    daily_wl: pd.DataFrame,
+    n_boot: int = 1000,
+    level: float = 0.95,
+    block_length: int = None,
+    min_segment: int = MIN_SEGMENT,
+    seed: int = 0
+) -> BreakpointFit:
+    """
+    h_crit as the break of a two-segment fit of recession slope on stage.
+
+    Parameters:
+        daily_wl: pd.DataFrame - Filtered days from calc_wetland_hcrit
+            (Date, water_level, slope)
+        n_boot: int - Block-bootstrap replicates for the interval, 0 to skip
+        level: float - Confidence level of the interval
+        block_length: int - Days per bootstrap block, defaults to n ** (1/3)
+        min_segment: int - Fewest days on either side of the break
+        seed: int - Seed of the resampling
+
+    Returns:
+        BreakpointFit, h_crit NaN when there are too few distinct stages
+    """
+    days = daily_wl.dropna(subset=['water_level', 'slope']).sort_values('Date')
+    stage = days['water_level'].to_numpy(dtype=float)
+    recession = days['slope'].to_numpy(dtype=float)
+
+    nan_line = (np.nan, np.nan)
+    no_break = BreakpointFit(np.nan, np.nan, np.nan, level, nan_line, nan_line, 0, 0, np.nan, np.empty(0))
+    if len(stage) < 2 * min_segment:
+        return no_break
+
+    order = np.argsort(stage, kind='stable')
+    x, y = stage[order], recession[order]
+
+    best, h_crit, sse = _best_breaks(x[None], y[None], min_segment)
+    best, h_crit, sse = int(best[0]), float(h_crit[0]), float(sse[0])
+    if np.isnan(h_crit):
+        return no_break
+
+    replicates = np.empty(0)
+    lower = upper = np.nan
+    if n_boot:
+        # Blocks follow the days in date order, then each replicate is sorted by stage
+        indices = block_bootstrap_indices(
+            len(stage), n_boot, block_length or default_block_length(len(stage)), np.random.default_rng(seed)
+        )
+        boot_order = np.argsort(stage[indices], axis=1, kind='stable')
+        boot_indices = np.take_along_axis(indices, boot_order, axis=1)
+        _, replicates, _ = _best_breaks(stage[boot_indices], recession[boot_indices], min_segment)
+
+        if np.isfinite(replicates).any():
+            lower, upper = np.nanpercentile(replicates, [100 * (1 - level) / 2, 100 * (1 + level) / 2])
+
+    return BreakpointFit(
+        h_crit=h_crit,
+        lower=float(lower),
+        upper=float(upper),
+        level=level,
+        left=_line(x[:best], y[:best]),
+        right=_line(x[best:], y[best:]),
+        n_left=best,
+        n_right=len(x) - best,
+        sse=sse,
+        replicates=replicates
+    )
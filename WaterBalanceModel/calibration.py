@@ -0,0 +1,282 @@
+"""
+Per-well calibration of the water-balance parameters against observed daily
+stage. A Latin hypercube seeds a differential-evolution search; every
+generation is evaluated as one batched simulate_stage call, wells run on a
+process pool, and each well's search is checkpointed so it can resume.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from WaterBalanceModel.simulate import DEFAULT_PARAMETERS, SIM_PARAMETERS, simulate_stage
+
+# Search ranges; et_scale multiplies climate.HARGREAVES_K, so the original
+# hard-coded k = 0.0023 * 0.4 is et_scale = 1
+PARAMETER_BOUNDS = {
+    'h_crit': (0.0, 0.6),
+    'et_scale': (0.25, 2.5),
+    'et_extinction': (0.2, 3.0),
+    'sy_soil': (0.02, 0.4),
+    'sy_ramp': (0.0, 0.5),
+    'leak': (0.0, 0.005)
+}
+
+
+def latin_hypercube(n: int, bounds: dict, rng: np.random.Generator) -> np.ndarray:
+    """
+    n stratified samples within bounds, one column per parameter
+    """
+    n_dims = len(bounds)
+    strata = rng.permuted(np.tile(np.arange(n), (n_dims, 1)), axis=1).T
+    unit = (strata + rng.random((n, n_dims))) / n
+
+    lower, upper = np.array(list(bounds.values()), dtype=float).T
+    return lower + unit * (upper - lower)
+
+
+def stage_rmse(simulated: np.ndarray, observed: np.ndarray) -> np.ndarray:
+    """
+    RMSE of each (batch, time) row against observed stage, skipping NaN days
+    """
+    observed_mask = ~np.isnan(observed)
+    errors = simulated[:, observed_mask] - observed[observed_mask]
+    return np.sqrt(np.mean(errors ** 2, axis=1))
+
+
+def _align_well(obs: pd.DataFrame, climate: pd.DataFrame):
+    """
+    Observed daily stage on the climate's days, from the first to the last
+    finite observation within the climate record
+    """
+    obs = obs.groupby(obs['Date'].dt.floor('D'))['water_level'].mean()
+    climate = climate.set_index(pd.DatetimeIndex(climate['date']).floor('D')).sort_index()
+
+    # The simulation starts from the first observed stage, so the record is
+    # cut to the observed days that climate covers
+    observed_days = obs.reindex(climate.index).dropna().index
+    if observed_days.empty:
+        raise ValueError("No observed stage on any day of the climate record")
+    climate = climate.loc[observed_days[0]:observed_days[-1]]
+    if climate[['precip', 'pet']].isna().any().any():
+        raise ValueError("Climate has missing precip or pet over the observed period")
+
+    observed = obs.reindex(climate.index).to_numpy(dtype=float)
+    return (
+        climate['precip'].to_numpy(dtype=float),
+        climate['pet'].to_numpy(dtype=float),
+        observed
+    )
+
+
+class _Objective:
+    """
+    RMSE of a batch of candidate parameter rows, in one simulate_stage call
+    """
+
+    def __init__(self, precip, pet, observed, names, fixed, backend='numpy'):
+        self.precip = precip
+        self.pet = pet
+        self.observed = observed
+        self.names = names
+        self.params = {**DEFAULT_PARAMETERS, **fixed}
+        self.backend = backend
+        # Start at the first observation (the series is trimmed to start there)
+        self.h0 = observed[0]
+
+    def __call__(self, candidates: np.ndarray) -> np.ndarray:
+        params = {**self.params, **dict(zip(self.names, candidates.T))}
+        h_crit = params.pop('h_crit')
+        simulated = simulate_stage(self.precip, self.pet, self.h0, h_crit, **params, backend=self.backend)
+        return stage_rmse(simulated.stage, self.observed)
+
+
+def _write_checkpoint(path: str, state: dict):
+    # Written beside the final path and moved in, so a partial write is never read
+    partial_path = path + '.partial'
+    with open(partial_path, 'wb') as f:
+        np.savez(f, **state)
+    os.replace(partial_path, path)
+
+
+def calibrate_well(
+    well_id: str,
+    obs: pd.DataFrame,
+    climate: pd.DataFrame,
+    bounds: dict = None,
+    fixed: dict = None,
+    n_init: int = 512,
+    popsize: int = 64,
+    max_generations: int = 200,
+    mutation: float = 0.7,
+    crossover: float = 0.9,
+    patience: int = 20,
+    tol: float = 1e-5,
+    seed: int = 0,
+    checkpoint_dir: str = None,
+    backend: str = 'numpy'
+) -> dict:
+    """
+    Calibrate one well's parameters by differential evolution (rand/1/bin).
+
+    The best popsize of n_init Latin-hypercube samples form the first
+    population; each generation's trial population is built and evaluated
+    as arrays. The search stops early once the best RMSE improved by less
+    than tol over the last patience generations.
+
+    Parameters:
+        obs: pd.DataFrame - The well's stage (Date, water_level), any frequency
+        climate: pd.DataFrame - Daily 'date', 'precip' and 'pet' (mm)
+        bounds: dict - Parameter -> (lower, upper), defaults to
+            PARAMETER_BOUNDS minus the fixed parameters
+        fixed: dict - Parameters held constant (e.g. a hydrograph h_crit)
+        checkpoint_dir: str - Where <well_id>.npz is saved after every
+            generation. An existing checkpoint is resumed only if it was
+            written for the same observed stage and climate, bounds, fixed,
+            popsize, n_init and seed; otherwise the search starts over
+        backend: str - simulate_stage backend ('numpy', 'numba' or 'auto')
+
+    Returns:
+        dict: Site_ID, the best parameters, rmse, generations and trace
+            (per-generation best and mean RMSE)
+    """
+    fixed = fixed or {}
+    if bounds is None:
+        bounds = {name: PARAMETER_BOUNDS[name] for name in SIM_PARAMETERS if name not in fixed}
+    names = list(bounds)
+    lower, upper = np.array(list(bounds.values()), dtype=float).T
+
+    precip, pet, observed = _align_well(obs, climate)
+    objective = _Objective(precip, pet, observed, names, fixed, backend)
+
+    checkpoint_path = None
+    if checkpoint_dir is not None:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        checkpoint_path = os.path.join(checkpoint_dir, f'{well_id}.npz')
+
+    # A checkpoint is only resumed by the search that wrote it, on the same
+    # data: new logger rows or climate change the hash and start over
+    data_hash = hashlib.sha256()
+    for values in (precip, pet, observed):
+        data_hash.update(np.ascontiguousarray(values, dtype='float64').tobytes())
+    search = json.dumps({
+        'bounds': {name: list(map(float, bound)) for name, bound in bounds.items()},
+        'fixed': {name: float(value) for name, value in fixed.items()},
+        'popsize': popsize,
+        'n_init': n_init,
+        'seed': seed,
+        'data': data_hash.hexdigest()
+    }, sort_keys=True)
+
+    state = None
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        with np.load(checkpoint_path) as saved:
+            if 'search' in saved.files and str(saved['search']) == search:
+                state = {key: saved[key] for key in saved.files}
+
+    if state is not None:
+        population = state['population']
+        fitness = state['fitness']
+        trace = [tuple(row) for row in state['trace']]
+        rng = np.random.default_rng()
+        rng.bit_generator.state = json.loads(str(state['rng_state']))
+    else:
+        # No checkpoint, or one from another search or other data: start over
+        rng = np.random.default_rng(seed)
+        samples = latin_hypercube(max(n_init, popsize), bounds, rng)
+        sample_fitness = objective(samples)
+        keep = np.argsort(sample_fitness)[:popsize]
+        population, fitness = samples[keep], sample_fitness[keep]
+        trace = [(fitness.min(), fitness.mean())]
+
+    n_pop, n_dims = population.shape
+    while len(trace) <= max_generations:
+        if len(trace) > patience and trace[-patience - 1][0] - trace[-1][0] < tol:
+            break
+
+        # Three distinct donors per member, none equal to the member itself
+        donors = np.argsort(rng.random((n_pop, n_pop)) + np.eye(n_pop), axis=1)[:, :3]
+        mutant = population[donors[:, 0]] + mutation * (population[donors[:, 1]] - population[donors[:, 2]])
+        mutant = np.clip(mutant, lower, upper)
+
+        cross = rng.random((n_pop, n_dims)) < crossover
+        cross[np.arange(n_pop), rng.integers(n_dims, size=n_pop)] = True
+        trial = np.where(cross, mutant, population)
+
+        trial_fitness = objective(trial)
+        better = trial_fitness <= fitness
+        population[better], fitness[better] = trial[better], trial_fitness[better]
+        trace.append((fitness.min(), fitness.mean()))
+
+        if checkpoint_path is not None:
+            _write_checkpoint(checkpoint_path, {
+                'population': population,
+                'fitness': fitness,
+                'trace': np.array(trace),
+                'rng_state': np.array(json.dumps(rng.bit_generator.state)),
+                'search': np.array(search)
+            })
+
+    best = int(np.argmin(fitness))
+    return {
+        'Site_ID': well_id,
+        **fixed,
+        **dict(zip(names, population[best].tolist())),
+        'rmse': float(fitness[best]),
+        'generations': len(trace) - 1,
+        'trace': pd.DataFrame(trace, columns=['best_rmse', 'mean_rmse']).rename_axis('generation').reset_index()
+    }
+
+
+def calibrate_wells(
+    wl_daily: pd.DataFrame,
+    climate: pd.DataFrame,
+    site_ids: list = None,
+    fixed: dict = None,
+    max_workers: int = None,
+    **de_kwargs
+):
+    """
+    Calibrate every well on a process pool (see calibrate_well).
+
+    Parameters:
+        wl_daily: pd.DataFrame - Stage of all wells (Date, Site_ID, water_level)
+        climate: pd.DataFrame - Daily 'date', 'precip', 'pet', shared by all
+            wells or with a Site_ID column for per-basin climate
+        fixed: dict - Site_ID -> parameters held constant for that well
+        max_workers: int - Pool size, defaults to the number of CPUs
+        de_kwargs - Passed to calibrate_well (bounds, popsize, checkpoint_dir...)
+
+    Returns:
+        best: pd.DataFrame - One row per well with its best parameters and RMSE
+        traces: pd.DataFrame - Per-generation best and mean RMSE of every well
+    """
+    fixed = fixed or {}
+    if site_ids is None:
+        site_ids = sorted(wl_daily['Site_ID'].unique())
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                calibrate_well,
+                site,
+                wl_daily.loc[wl_daily['Site_ID'] == site, ['Date', 'water_level']],
+                climate[climate['Site_ID'] == site] if 'Site_ID' in climate.columns else climate,
+                fixed=fixed.get(site),
+                **de_kwargs
+            )
+            for site in site_ids
+        ]
+        results = [future.result() for future in futures]
+
+    traces = pd.concat(
+        [result.pop('trace').assign(Site_ID=result['Site_ID']) for result in results],
+        ignore_index=True
+    )
+    best = pd.DataFrame(results)
+
+    return best, traces
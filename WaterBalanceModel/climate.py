@@ -0,0 +1,357 @@
+"""
+Climate forcing for the water balance: Hargreaves PET, rolling
+precipitation, PET and P - PET balances over many window lengths, for a
+single regional series or per pixel of a local PRISM raster stack.
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Solar constant (MJ/m²/min)
+GSC = 0.0820
+
+# Hargreaves coefficient used in calc_PRISM_wtr_budget.py, 0.0023 scaled by 0.4
+HARGREAVES_K = 0.0023 * 0.4
+
+PRISM_VARIABLES = ('ppt', 'tmin', 'tmax', 'tmean')
+
+
+def extraterrestrial_radiation(julian_day, lat_deg):
+    """
+    FAO-56 extraterrestrial radiation Ra (MJ/m²/day).
+
+    julian_day and lat_deg broadcast against each other, e.g. days of shape
+    (T, 1) against per-row latitudes of shape (H,) give a (T, H) grid.
+    """
+    julian_day = np.asarray(julian_day, dtype=float)
+    phi = np.radians(lat_deg)  # Convert to radians
+
+    delta = 0.409 * np.sin(2 * np.pi / 365 * julian_day - 1.39)  # Solar declination
+    # Clipped so latitudes with polar day/night stay defined
+    omega_s = np.arccos(np.clip(-np.tan(phi) * np.tan(delta), -1, 1))  # Sunset hour angle
+    # NOTE: FAO-56 eq. 23 uses 0.033; 0.33 is kept from the original
+    # regional calculation so both modes give the same PET
+    dr = 1 + 0.33 * np.cos(2 * np.pi / 365 * julian_day)  # Inverse relative Earth-Sun distance
+
+    return (
+        (24 * 60 / np.pi) * GSC * dr * (
+            omega_s * np.sin(phi) * np.sin(delta) +
+            np.cos(phi) * np.cos(delta) * np.sin(omega_s)
+        )
+    )
+
+
+def hargreaves_pet(ra, temp, temp_max, temp_min, k: float = HARGREAVES_K):
+    """
+    Hargreaves PET (mm/day) from Ra and daily mean, max and min temperature
+    """
+    with np.errstate(invalid='ignore'):
+        return k * ra * (temp + 17.8) * np.sqrt(temp_max - temp_min)
+
+
+def _prefix_sums(values: np.ndarray):
+    """
+    Cumulative sums of values (NaN as 0) and of valid counts along axis 0,
+    with a leading row of zeros
+    """
+    valid = ~np.isnan(values)
+    zeros = np.zeros((1,) + values.shape[1:])
+    cum_values = np.concatenate([zeros, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    cum_valid = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+
+    return cum_values, cum_valid
+
+
+def _window_from_prefix(
+    cum_values: np.ndarray,
+    cum_valid: np.ndarray,
+    windows: np.ndarray,
+    closed: str,
+    min_periods: int = None
+):
+    """
+    Trailing-window sums and counts for every window from prefix sums
+    """
+    if closed not in ('right', 'both'):
+        raise ValueError(f"Unknown closed: {closed}. Available options: 'right', 'both'")
+
+    n = cum_values.shape[0] - 1
+    span = windows + (1 if closed == 'both' else 0)
+    end = np.arange(1, n + 1)
+    start = np.clip(end[None, :] - span[:, None], 0, None)
+
+    sums = cum_values[end][None] - cum_values[start]
+    counts = cum_valid[end][None] - cum_valid[start]
+
+    required = windows if min_periods is None else np.full(len(windows), min_periods)
+    required = required.reshape((-1,) + (1,) * (cum_values.ndim))
+    sums = np.where(counts >= required, sums, np.nan)
+
+    return sums, counts
+
+
+def rolling_window_sums(
+    values: np.ndarray,
+    windows,
+    closed: str = 'right',
+    min_periods: int = None
+):
+    """
+    Trailing-window sums and valid counts for many windows from one
+    cumulative-sum pass, matching pandas rolling(window).sum() NaN handling.
+
+    Parameters:
+        values: np.ndarray - Series along axis 0 (any trailing shape)
+        windows: list - Window lengths in samples
+        closed: str - 'right' spans window samples, 'both' spans window + 1
+            (pandas' fixed-window closed='both')
+        min_periods: int - Minimum valid samples, defaults to each window
+
+    Returns:
+        sums: np.ndarray - Shape (len(windows), *values.shape), NaN where
+            fewer than min_periods samples are valid
+        counts: np.ndarray - Valid samples in each window, same shape
+    """
+    cum_values, cum_valid = _prefix_sums(np.asarray(values, dtype=float))
+
+    return _window_from_prefix(
+        cum_values,
+        cum_valid,
+        np.asarray(windows, dtype=int),
+        closed,
+        min_periods
+    )
+
+
+def rolling_climate(
+    climate: pd.DataFrame,
+    windows,
+    variables=('pet', 'precip'),
+    balance=('precip', 'pet'),
+    closed: str = 'right',
+    dtype: str = 'float32'
+) -> pd.DataFrame:
+    """
+    Rolling means, cumulative sums and P - PET balances for every window.
+
+    Each variable is a single cumulative-sum pass regardless of how many
+    windows are requested, so sweeping dozens of window lengths is cheap.
+
+    Parameters:
+        climate: pd.DataFrame - Daily climate rows in date order
+        windows: list - Window lengths in days, e.g. range(1, 91)
+        variables: tuple - Columns to roll
+        balance: tuple - (precip, pet) columns whose cumulative difference
+            is reported as '<w>d_cum_balance', or None to skip
+        closed: str - 'right' for w-day windows, 'both' to reproduce
+            rolling(w, closed='both'), which spans w + 1 days
+        dtype: str - dtype of the returned columns
+
+    Returns:
+        pd.DataFrame: '<w>d_mean_<var>', '<w>d_cum_<var>' and
+            '<w>d_cum_balance' columns, aligned with climate's index
+    """
+    windows = list(windows)
+    columns = {}
+    cum = {}
+
+    for var in variables:
+        sums, counts = rolling_window_sums(climate[var].to_numpy(), windows, closed=closed)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = sums / counts
+
+        for i, window in enumerate(windows):
+            columns[f'{window}d_mean_{var}'] = means[i].astype(dtype)
+            columns[f'{window}d_cum_{var}'] = sums[i].astype(dtype)
+            cum[(var, window)] = sums[i]
+
+    if balance is not None:
+        precip, pet = balance
+        for window in windows:
+            columns[f'{window}d_cum_balance'] = (cum[(precip, window)] - cum[(pet, window)]).astype(dtype)
+
+    return pd.DataFrame(columns, index=climate.index)
+
+
+def find_prism_rasters(directory: str, variables=PRISM_VARIABLES) -> pd.DataFrame:
+    """
+    Index local daily PRISM rasters by date and variable.
+
+    File names must contain the variable as an underscore-separated token
+    and a YYYYMMDD date, as in PRISM's 'PRISM_tmin_stable_4kmD2_20200101_bil.bil'.
+
+    Returns:
+        pd.DataFrame: Date index, one column of file paths per variable
+    """
+    records = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in ('.bil', '.tif', '.tiff'):
+                continue
+
+            date = re.search(r'(?<!\d)(\d{8})(?!\d)', stem)
+            tokens = stem.split('_')
+            variable = next((var for var in variables if var in tokens), None)
+            if date is None or variable is None:
+                continue
+
+            records.append({
+                'date': pd.to_datetime(date.group(1), format='%Y%m%d'),
+                'variable': variable,
+                'path': os.path.join(root, name)
+            })
+
+    if not records:
+        return pd.DataFrame(columns=list(variables))
+
+    return pd.DataFrame(records).pivot(index='date', columns='variable', values='path').sort_index()
+
+
+def _read_band(path: str, window=None) -> np.ndarray:
+    """
+    First band of a raster as float32, nodata as NaN
+    """
+    import rasterio
+
+    with rasterio.open(path) as src:
+        return src.read(1, window=window, masked=True).astype('float32').filled(np.nan)
+
+
+def gridded_water_balance(
+    rasters: pd.DataFrame,
+    out_dir: str,
+    windows=(5, 10, 20),
+    k: float = HARGREAVES_K,
+    bounds=None,
+    closed: str = 'right',
+    max_block_mb: float = 256
+) -> dict:
+    """
+    Per-pixel Hargreaves PET and rolling P - PET balances from daily rasters.
+
+    The daily rasters are stacked into memory-mapped .npy files, then PET
+    and the balances are computed in blocks of rows with vectorized NumPy,
+    using each row's own latitude for Ra. When one row of the whole record
+    doesn't fit in max_block_mb, single rows are split into blocks of days,
+    so peak memory follows max_block_mb at any record length. Its floor is
+    one raster row over the longest window.
+
+    Parameters:
+        rasters: pd.DataFrame - Output of find_prism_rasters, one row per
+            consecutive day with ppt, tmin, tmax and tmean paths
+        out_dir: str - Where the .npy stacks and grid.json are written
+        windows: tuple - Balance window lengths in days
+        bounds: tuple - (left, bottom, right, top) to read, in the raster
+            CRS, defaults to the full raster
+        closed: str - Window definition, see rolling_climate
+
+    Returns:
+        dict: Name -> .npy path for 'pet' and each '<w>d_cum_balance',
+            plus 'grid' -> grid.json with dates, transform and CRS. Open the
+            stacks with np.load(path, mmap_mode='r'); shape is (days, rows, cols)
+    """
+    import rasterio
+    from rasterio.windows import from_bounds
+
+    rasters = rasters.sort_index()
+    missing = rasters[list(PRISM_VARIABLES)].isna().any(axis=1)
+    if missing.any():
+        raise ValueError(f"{missing.sum()} days are missing at least one of {PRISM_VARIABLES}")
+
+    dates = pd.DatetimeIndex(rasters.index)
+    if len(dates) > 1 and (np.diff(dates.values) != np.timedelta64(1, 'D')).any():
+        raise ValueError("Raster dates must be consecutive days for rolling windows")
+
+    with rasterio.open(rasters['ppt'].iloc[0]) as src:
+        if src.crs is not None and not src.crs.is_geographic:
+            raise ValueError("Per-row latitude needs a geographic CRS, like PRISM's NAD83")
+        window = from_bounds(*bounds, transform=src.transform).round_offsets().round_lengths() if bounds else None
+        transform = src.window_transform(window) if window else src.transform
+        height = int(window.height) if window else src.height
+        width = int(window.width) if window else src.width
+        crs = src.crs.to_wkt() if src.crs else None
+
+    os.makedirs(out_dir, exist_ok=True)
+    n_days = len(dates)
+    shape = (n_days, height, width)
+
+    # 1) Stack each variable on disk, one day at a time
+    stacks = {}
+    for var in PRISM_VARIABLES:
+        stacks[var] = np.lib.format.open_memmap(
+            os.path.join(out_dir, f'{var}.npy'), mode='w+', dtype='float32', shape=shape
+        )
+        for t, path in enumerate(rasters[var]):
+            band = _read_band(path, window)
+            if band.shape != (height, width):
+                raise ValueError(f"{path} does not match the grid of the first ppt raster")
+            stacks[var][t] = band
+        stacks[var].flush()
+
+    # 2) Row latitudes (row centres) for Ra
+    lat = transform.f + transform.e * (np.arange(height) + 0.5)
+    doy = dates.dayofyear.to_numpy()
+
+    outputs = {'pet': os.path.join(out_dir, 'pet.npy')}
+    pet = np.lib.format.open_memmap(outputs['pet'], mode='w+', dtype='float32', shape=shape)
+    balances = {}
+    for w in windows:
+        outputs[f'{w}d_cum_balance'] = os.path.join(out_dir, f'{w}d_cum_balance.npy')
+        balances[w] = np.lib.format.open_memmap(
+            outputs[f'{w}d_cum_balance'], mode='w+', dtype='float32', shape=shape
+        )
+
+    # 3) Blocks of rows and days sized for ~16 float32 copies at once. Each
+    # block of days is read with the longest window's span of days before
+    # it, so its balances don't depend on the blocks before
+    window_array = np.asarray(windows, dtype=int)
+    history = int(window_array.max()) + (1 if closed == 'both' else 0) if len(window_array) else 0
+    budget_cells = max_block_mb * 1e6 // (4 * 16)
+    rows_fit = int(budget_cells // (n_days * width))
+    block_rows = min(height, max(rows_fit, 1))
+    block_days = n_days if rows_fit else int(max(1, budget_cells // width - history))
+
+    for r0 in range(0, height, block_rows):
+        r1 = min(r0 + block_rows, height)
+        for t0 in range(0, n_days, block_days):
+            t1 = min(t0 + block_days, n_days)
+            h0 = max(t0 - history, 0)
+
+            ra = extraterrestrial_radiation(doy[h0:t1, None], lat[None, r0:r1]).astype('float32')
+            pet_block = hargreaves_pet(
+                ra[:, :, None],
+                stacks['tmean'][h0:t1, r0:r1],
+                stacks['tmax'][h0:t1, r0:r1],
+                stacks['tmin'][h0:t1, r0:r1],
+                k=k
+            ).astype('float32')
+            pet[t0:t1, r0:r1] = pet_block[t0 - h0:]
+
+            cum_ppt = _prefix_sums(np.asarray(stacks['ppt'][h0:t1, r0:r1], dtype=float))
+            cum_pet = _prefix_sums(pet_block.astype(float))
+            for i, w in enumerate(window_array):
+                ppt_sum, _ = _window_from_prefix(*cum_ppt, window_array[i:i + 1], closed)
+                pet_sum, _ = _window_from_prefix(*cum_pet, window_array[i:i + 1], closed)
+                balances[w][t0:t1, r0:r1] = (ppt_sum[0] - pet_sum[0])[t0 - h0:].astype('float32')
+
+    pet.flush()
+    for balance in balances.values():
+        balance.flush()
+
+    outputs['grid'] = os.path.join(out_dir, 'grid.json')
+    with open(outputs['grid'], 'w') as f:
+        json.dump({
+            'dates': [d.strftime('%Y-%m-%d') for d in dates],
+            'transform': list(transform)[:6],
+            'crs': crs,
+            'windows': [int(w) for w in windows],
+            'closed': closed,
+            'files': {name: os.path.basename(path) for name, path in outputs.items() if name != 'grid'}
+        }, f)
+
+    return outputs
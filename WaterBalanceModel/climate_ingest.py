@@ -0,0 +1,157 @@
+"""
+Incremental per-basin climate ingestion from local PRISM raster
+directories. The date range is split into calendar chunks that are reduced
+on a worker pool; finished chunks are recorded in a manifest with a
+fingerprint of their input files, so re-runs only process new or changed
+chunks (e.g. appending the latest month).
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import geopandas as gpd
+import pandas as pd
+
+from WaterBalanceModel.climate import find_prism_rasters
+from WaterBalanceModel.zonal_stats import ZonalWeights, build_zonal_weights, zonal_means
+
+_MANIFEST = 'manifest.json'
+
+# Zonal weights for this worker, set once by _init_worker
+_WEIGHTS = {}
+
+
+def _weights_fingerprint(weights: ZonalWeights) -> str:
+    sha = hashlib.sha256()
+    for array in (weights.matrix.data, weights.matrix.indices, weights.matrix.indptr):
+        sha.update(array.tobytes())
+    sha.update(json.dumps([str(b) for b in weights.basin_ids]).encode())
+    sha.update(json.dumps([list(weights.transform)[:6], list(weights.shape)]).encode())
+    return sha.hexdigest()
+
+
+def _chunk_fingerprint(chunk: pd.DataFrame) -> str:
+    """
+    Hash of every input file's name, size and modification time
+    """
+    sha = hashlib.sha256()
+    for date, row in chunk.iterrows():
+        for var, path in row.items():
+            if isinstance(path, str):
+                stat = os.stat(path)
+                sha.update(f'{date:%Y%m%d}|{var}|{os.path.basename(path)}|{stat.st_size}|{stat.st_mtime_ns}'.encode())
+    return sha.hexdigest()
+
+
+def _write_manifest(manifest: dict, manifest_path: str):
+    # Replaced atomically so an interrupted run never leaves a torn manifest
+    partial_path = manifest_path + '.partial'
+    with open(partial_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(partial_path, manifest_path)
+
+
+def _init_worker(weights: ZonalWeights):
+    _WEIGHTS['weights'] = weights
+
+
+def _process_chunk(key: str, chunk: pd.DataFrame, chunk_path: str) -> str:
+    """
+    Worker task: per-basin means for one chunk of days, written to Parquet
+    """
+    zonal_means(chunk, _WEIGHTS['weights']).to_parquet(chunk_path, index=False)
+    return key
+
+
+def ingest_basin_climate(
+    prism_dir: str,
+    basins: gpd.GeoDataFrame,
+    out_dir: str,
+    start=None,
+    end=None,
+    chunk: str = 'M',
+    id_col: str = 'Site_ID',
+    weights: ZonalWeights = None,
+    max_workers: int = None
+) -> pd.DataFrame:
+    """
+    Per-basin daily climate from a directory of PRISM rasters, incrementally.
+
+    Parameters:
+        prism_dir: str - Directory searched by climate.find_prism_rasters
+        basins: gpd.GeoDataFrame - Basin polygons
+        out_dir: str - Holds one Parquet file per chunk and the manifest
+        start, end: Optional inclusive date bounds
+        chunk: str - Pandas period frequency of a chunk, monthly by default
+            so appending a month touches one chunk
+        weights: ZonalWeights - Prebuilt weights, built from basins otherwise
+        max_workers: int - Pool size, defaults to the number of CPUs
+
+    Returns:
+        pd.DataFrame: Every ingested date and basin (see zonal_stats.zonal_means)
+    """
+    rasters = find_prism_rasters(prism_dir)
+    if start is not None:
+        rasters = rasters[rasters.index >= pd.Timestamp(start)]
+    if end is not None:
+        rasters = rasters[rasters.index <= pd.Timestamp(end)]
+    if rasters.empty:
+        raise ValueError(f"No PRISM rasters found in {prism_dir} for the requested dates")
+
+    if weights is None:
+        weights = build_zonal_weights(basins, rasters['ppt'].dropna().iloc[0], id_col=id_col)
+
+    chunk_dir = os.path.join(out_dir, 'chunks')
+    os.makedirs(chunk_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, _MANIFEST)
+
+    manifest = {'weights': _weights_fingerprint(weights), 'chunks': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+        # Different basins or grid invalidate every chunk
+        if previous.get('weights') == manifest['weights']:
+            manifest['chunks'] = previous['chunks']
+
+    chunks = {
+        str(period): group
+        for period, group in rasters.groupby(rasters.index.to_period(chunk))
+    }
+
+    pending = {}
+    for key, group in chunks.items():
+        fingerprint = _chunk_fingerprint(group)
+        done = manifest['chunks'].get(key)
+        chunk_path = os.path.join(chunk_dir, f'{key}.parquet')
+        if done is None or done['fingerprint'] != fingerprint or not os.path.exists(chunk_path):
+            pending[key] = (group, chunk_path, fingerprint)
+
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(weights,)
+        ) as executor:
+            futures = [
+                executor.submit(_process_chunk, key, group, chunk_path)
+                for key, (group, chunk_path, _) in pending.items()
+            ]
+            # Record each chunk as soon as it lands so a crash loses little work
+            for future in as_completed(futures):
+                key = future.result()
+                group, chunk_path, fingerprint = pending[key]
+                manifest['chunks'][key] = {
+                    'fingerprint': fingerprint,
+                    'file': os.path.basename(chunk_path),
+                    'days': len(group)
+                }
+                _write_manifest(manifest, manifest_path)
+
+    frames = [
+        pd.read_parquet(os.path.join(chunk_dir, manifest['chunks'][key]['file']))
+        for key in sorted(chunks)
+    ]
+
+    return pd.concat(frames, ignore_index=True).sort_values(['date', 'Site_ID'], ignore_index=True)
@@ -0,0 +1,220 @@
+"""
+Spill (pour-point) elevation of a wetland basin from a DEM.
+
+A priority flood is grown outward from the basin's lowest cell: cells are
+popped in elevation order and the flood level is the highest elevation
+popped so far. The first cell outside the basin that lies below the flood
+level means water is running down the far side of the rim, so the level at
+that moment is the spill elevation. Only the depression and its rim are
+visited, and only a window around them is read, so memory follows the
+depression rather than the raster. The flood loop is compiled with numba
+when available (see kernels.priority_flood).
+"""
+
+import heapq
+import math
+from dataclasses import dataclass
+
+import geopandas as gpd
+import numpy as np
+
+from WaterBalanceModel.kernels import priority_flood, resolve_backend
+
+# 8-connected neighbour offsets
+_NEIGHBOURS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+@dataclass
+class SpillResult:
+    """
+    Attributes:
+        site_id: Wetland ID
+        spill_elevation: float - Flood level at which the basin overflows
+        bottom_elevation: float - Lowest DEM cell inside the basin
+        h_crit: float - spill_elevation - bottom_elevation (DEM units)
+        spill_xy: tuple - Map coordinates of the rim cell the flood spilled over
+        n_flooded: int - Cells popped before the spill was found
+    """
+    site_id: str
+    spill_elevation: float
+    bottom_elevation: float
+    h_crit: float
+    spill_xy: tuple
+    n_flooded: int
+
+
+def _basin_window(src, geom):
+    """
+    Raster window covering a geometry (clipped to the raster) and the
+    boolean mask of cells inside the geometry within that window
+    """
+    from rasterio.features import geometry_mask
+    from rasterio.windows import Window, from_bounds
+
+    window = from_bounds(*geom.bounds, transform=src.transform)
+    window = window.round_offsets(op='floor').round_lengths(op='ceil')
+    col_off, row_off = max(int(window.col_off), 0), max(int(window.row_off), 0)
+    width = min(int(window.col_off + window.width), src.width) - col_off
+    height = min(int(window.row_off + window.height), src.height) - row_off
+    if width <= 0 or height <= 0:
+        raise ValueError("Basin does not overlap the DEM")
+    window = Window(col_off, row_off, width, height)
+
+    inside = geometry_mask(
+        [geom],
+        out_shape=(height, width),
+        transform=src.window_transform(window),
+        invert=True,
+        all_touched=False
+    )
+    return window, inside
+
+
+def _flood_heapq(dem: np.ndarray, inside: np.ndarray, seed_r: int, seed_c: int):
+    """
+    NumPy-backend priority flood over an in-memory window; same steps and
+    return values as kernels.priority_flood
+    """
+    n_rows, n_cols = dem.shape
+    # Memoryview indexing returns Python floats, far cheaper per cell than numpy scalars
+    elevation = dem.data
+    is_inside = inside.data
+    visited = np.zeros(dem.shape, dtype=bool).data
+
+    level = elevation[seed_r, seed_c]
+    rim_r, rim_c = seed_r, seed_c
+    visited[seed_r, seed_c] = True
+    heap = [(level, seed_r, seed_c)]
+    n_flooded = 0
+
+    while heap:
+        z, r, c = heapq.heappop(heap)
+        n_flooded += 1
+
+        # Descending the far side of the rim: the basin overflows at level
+        if z < level and not is_inside[r, c]:
+            break
+        if z > level:
+            level, rim_r, rim_c = z, r, c
+
+        outlet = False
+        for dr, dc in _NEIGHBOURS:
+            nr, nc = r + dr, c + dc
+            if not (0 <= nr < n_rows and 0 <= nc < n_cols):
+                return True, level, rim_r, rim_c, n_flooded
+            if visited[nr, nc]:
+                continue
+            visited[nr, nc] = True
+            nz = elevation[nr, nc]
+            if math.isnan(nz):
+                outlet = True
+                continue
+            heapq.heappush(heap, (nz, nr, nc))
+
+        if outlet:
+            break
+
+    return False, level, rim_r, rim_c, n_flooded
+
+
+def spill_elevation(src, geom, margin: int = 64, backend: str = 'auto') -> dict:
+    """
+    Spill elevation of the depression holding a basin's lowest cell.
+
+    The flood runs on an in-memory window around the basin. A flood that
+    reaches the window's edge is rerun on a window twice as wide, so only
+    the depression, its rim and their surroundings are ever read.
+
+    Parameters:
+        src: rasterio.DatasetReader - Open DEM
+        geom: shapely geometry - Basin polygon in the DEM's CRS
+        margin: int - Cells read around the basin at first
+        backend: str - 'numpy', 'numba' or 'auto' (numba when installed);
+            both give identical results
+
+    Returns:
+        dict: spill_elevation, bottom_elevation, spill_row, spill_col (the rim
+            cell), n_flooded
+
+    Off-DEM cells and nodata are treated as outlets, so a depression that
+    reaches the raster edge spills at the level it had when it got there.
+    """
+    from rasterio.windows import Window
+
+    flood = priority_flood if resolve_backend(backend) == 'numba' else _flood_heapq
+
+    window, inside = _basin_window(src, geom)
+    basin_dem = src.read(1, window=window, masked=True).astype('float64').filled(np.nan)
+    basin_dem[~inside] = np.nan
+    if np.isnan(basin_dem).all():
+        raise ValueError("No valid DEM cells inside the basin")
+
+    seed = np.unravel_index(np.nanargmin(basin_dem), basin_dem.shape)
+    row0, col0 = int(window.row_off), int(window.col_off)
+    n_rows, n_cols = inside.shape
+
+    while True:
+        top, left = max(row0 - margin, 0), max(col0 - margin, 0)
+        bottom_edge = min(row0 + n_rows + margin, src.height)
+        right = min(col0 + n_cols + margin, src.width)
+        flood_window = Window(left, top, right - left, bottom_edge - top)
+        dem = src.read(1, window=flood_window, masked=True).astype('float64').filled(np.nan)
+
+        # One NaN cell beyond every raster edge the window touches: an outlet
+        pad = ((int(top == 0), int(bottom_edge == src.height)), (int(left == 0), int(right == src.width)))
+        dem = np.pad(dem, pad, constant_values=np.nan)
+        flood_inside = np.zeros(dem.shape, dtype=bool)
+        r0, c0 = row0 - top + pad[0][0], col0 - left + pad[1][0]
+        flood_inside[r0:r0 + n_rows, c0:c0 + n_cols] = inside
+
+        reached_edge, level, rim_r, rim_c, n_flooded = flood(
+            np.ascontiguousarray(dem), flood_inside, int(seed[0] + r0), int(seed[1] + c0)
+        )
+        if not reached_edge:
+            break
+        margin *= 2
+
+    return {
+        'spill_elevation': float(level),
+        'bottom_elevation': float(basin_dem[seed]),
+        'spill_row': int(rim_r - r0 + row0),
+        'spill_col': int(rim_c - c0 + col0),
+        'n_flooded': int(n_flooded)
+    }
+
+
+def calc_dem_hcrit(
+    Site_ID: str,
+    wetland_basin: gpd.GeoDataFrame,
+    dem_path: str,
+    margin: int = 64,
+    backend: str = 'auto'
+) -> SpillResult:
+    """
+    h_crit of a wetland as the depth of its basin's depression at spill.
+
+    Parameters:
+        Site_ID: str - Wetland ID
+        wetland_basin: gpd.GeoDataFrame - The wetland's basin polygon(s)
+        dem_path: str - DEM raster, any CRS (the basin is reprojected to it)
+        margin, backend - See spill_elevation
+
+    Returns:
+        SpillResult: h_crit is relative to the basin's lowest DEM cell, so
+            it compares with stage measured from the wetland bottom
+    """
+    import rasterio
+
+    with rasterio.open(dem_path) as src:
+        geom = wetland_basin.to_crs(src.crs).geometry.union_all()
+        spill = spill_elevation(src, geom, margin=margin, backend=backend)
+        spill_xy = src.xy(spill['spill_row'], spill['spill_col'])
+
+    return SpillResult(
+        site_id=Site_ID,
+        spill_elevation=spill['spill_elevation'],
+        bottom_elevation=spill['bottom_elevation'],
+        h_crit=spill['spill_elevation'] - spill['bottom_elevation'],
+        spill_xy=(float(spill_xy[0]), float(spill_xy[1])),
+        n_flooded=spill['n_flooded']
+    )
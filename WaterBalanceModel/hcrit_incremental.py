@@ -0,0 +1,265 @@
+"""
+Incremental night-recession fits for h_crit. Each site keeps a state
+directory with the fitted nights (one Parquet part per update), running
+moments of their slopes and the raw rows of the last two days with night
+data plus the last observed day, whose nights may still change. An update
+fits only the nights the new rows complete, and the 2σ slope filter is
+rebuilt from the stored moments, so the result matches calc_wetland_hcrit
+on the full record without refitting it.
+
+State layout (<state_dir>/<Site_ID>/):
+    state.json - Parameters, slope moments, part and tail file names
+    nights_<n>.parquet - Final nights added by update n (merged into
+        nights_<n>_merged.parquet once there are many)
+    tail_<n>.parquet - Raw rows still needed by the next update
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from WaterBalanceModel.breakpoint import fit_breakpoint
+from WaterBalanceModel.hydrograph_h_crit import (
+    HcritResult,
+    _filter_recession_days,
+    _recession_line_ci,
+    _recession_slopes_vectorized
+)
+from WaterBalanceModel.kernels import resolve_backend
+from WaterBalanceModel.profiling import NULL_PROFILER
+
+_STATE = 'state.json'
+
+# Night parts are merged into one file beyond this many, so reading the
+# stored nights stays a handful of file opens however many updates ran
+_MAX_PARTS = 8
+
+NIGHT_COLUMNS = ['Date', 'water_level', 'next_date', 'slope', 'p_value', 'n_obs']
+
+
+def slope_moments(slopes) -> tuple:
+    """
+    (count, mean, sum of squared deviations) of the non-NaN slopes
+    """
+    slopes = np.asarray(slopes, dtype=float)
+    slopes = slopes[~np.isnan(slopes)]
+    if len(slopes) == 0:
+        return 0, 0.0, 0.0
+
+    mean = slopes.mean()
+    return len(slopes), float(mean), float(((slopes - mean) ** 2).sum())
+
+
+def combine_moments(a: tuple, b: tuple) -> tuple:
+    """
+    Moments of the union of two sets from the moments of each (Chan et al.)
+    """
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    n = n_a + n_b
+    if n == 0:
+        return 0, 0.0, 0.0
+
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta * delta * n_a * n_b / n
+
+    return n, mean, m2
+
+
+def _mean_std(moments: tuple):
+    # Same conventions as pandas' mean() and std() (ddof=1)
+    n, mean, m2 = moments
+    return (mean if n else np.nan), (np.sqrt(m2 / (n - 1)) if n > 1 else np.nan)
+
+
+def _daily_means(hydrograph: pd.DataFrame) -> pd.DataFrame:
+    return hydrograph.groupby(hydrograph['Date'].dt.date).agg(
+        {'water_level': 'mean'}
+    ).reset_index()
+
+
+def _write_state(state: dict, state_path: str):
+    # Written last and replaced atomically: files it doesn't name are ignored
+    partial_path = state_path + '.partial'
+    with open(partial_path, 'w') as f:
+        json.dump(state, f, indent=1)
+    os.replace(partial_path, state_path)
+
+
+def _load_state(site_dir: str, parameters: dict) -> dict:
+    state_path = os.path.join(site_dir, _STATE)
+    if not os.path.exists(state_path):
+        return {
+            'parameters': parameters,
+            'updates': 0,
+            'parts': [],
+            'tail': None,
+            'last_date': None,
+            'moments': [0, 0.0, 0.0]
+        }
+
+    with open(state_path) as f:
+        state = json.load(f)
+    # State written before the regression option always used OLS
+    state['parameters'].setdefault('regression', 'ols')
+    if state['parameters'] != parameters:
+        raise ValueError(
+            f"State in {site_dir} was built with {state['parameters']}, not {parameters}; "
+            "use a new state_dir to change parameters"
+        )
+    return state
+
+
+def update_wetland_hcrit(
+    state_dir: str,
+    Site_ID: str,
+    new_stage: pd.DataFrame,
+    evening_cut: int,
+    morning_cut: int,
+    stage_filter: float,
+    backend: str = 'numpy',
+    profiler=NULL_PROFILER,
+    regression: str = 'ols',
+    n_boot: int = 0
+) -> HcritResult:
+    """
+    Add newly downloaded stage rows to a site's stored h_crit fits.
+
+    The first call (no state yet) fits the whole record it is given; later
+    calls cost time proportional to the new rows. Rows at or before the
+    last stored timestamp are skipped, so overlapping downloads are safe.
+
+    Parameters:
+        new_stage: pd.DataFrame - Date and water_level of one site (flagged
+            rows already removed, as for calc_wetland_hcrit)
+        evening_cut, morning_cut, stage_filter, regression - As
+            calc_wetland_hcrit; fixed for the lifetime of a state directory
+        n_boot: int - Bootstrap replicates of the h_crit and recession-line
+            intervals, 0 (the default) for the point estimates only
+
+    Returns:
+        HcritResult: Nights and daily_wl of the full record. hydrograph holds
+            only the rows this update processed and sample_nights is empty.
+    """
+    site_dir = os.path.join(state_dir, str(Site_ID))
+    parameters = {
+        'evening_cut': evening_cut,
+        'morning_cut': morning_cut,
+        'stage_filter': stage_filter,
+        'regression': regression
+    }
+
+    with profiler.phase('load_state'):
+        state = _load_state(site_dir, parameters)
+        tail = pd.DataFrame({'Date': pd.Series(dtype='datetime64[ns]'), 'water_level': pd.Series(dtype=float)})
+        if state['tail'] is not None:
+            tail = pd.read_parquet(os.path.join(site_dir, state['tail']))
+
+    new_rows = new_stage[['Date', 'water_level']]
+    if state['last_date'] is not None:
+        new_rows = new_rows[new_rows['Date'] > pd.Timestamp(state['last_date'])]
+    segment = pd.concat([df for df in (tail, new_rows) if len(df)] or [tail])
+    segment = segment.sort_values('Date', kind='stable', ignore_index=True)
+
+    with profiler.phase('fit_new_nights'):
+        clean = segment[segment['water_level'] >= stage_filter]
+        clean = clean[(clean['Date'].dt.hour >= evening_cut) | (clean['Date'].dt.hour <= morning_cut)]
+        nights, _ = _recession_slopes_vectorized(
+            clean, evening_cut, morning_cut, resolve_backend(backend), regression=regression
+        )
+        nights = pd.merge(_daily_means(segment), nights, on='Date', how='inner')[NIGHT_COLUMNS]
+
+    # The last nights' mornings and the last day's evening may still grow,
+    # so the last two days with night rows are refitted next time, and the
+    # last observed day is kept for its daily mean. Below-filter days in
+    # between can't gain rows, so a dry spell doesn't grow the tail.
+    tail_days = pd.DatetimeIndex([])
+    tail_start = None
+    if len(segment):
+        days = clean['Date'].dt.normalize().unique()
+        tail_days = pd.DatetimeIndex(days[-2:]).union([segment['Date'].max().normalize()])
+        tail_start = tail_days[0]
+
+    if tail_start is not None:
+        final = nights['Date'] < tail_start.date()
+        new_final, provisional = nights[final], nights[~final]
+    else:
+        new_final, provisional = nights, nights.iloc[:0]
+
+    with profiler.phase('save_state'):
+        os.makedirs(site_dir, exist_ok=True)
+        update = state['updates'] + 1
+        previous_tail = state['tail']
+
+        if len(new_final):
+            part = f'nights_{update:05d}.parquet'
+            new_final.to_parquet(os.path.join(site_dir, part), index=False)
+            state['parts'].append(part)
+            state['moments'] = list(combine_moments(state['moments'], slope_moments(new_final['slope'])))
+
+        if tail_start is not None:
+            state['tail'] = f'tail_{update:05d}.parquet'
+            tail = segment[segment['Date'].dt.normalize().isin(tail_days)]
+            tail.to_parquet(os.path.join(site_dir, state['tail']), index=False)
+            state['last_date'] = segment['Date'].max().isoformat()
+
+        state['updates'] = update
+        _write_state(state, os.path.join(site_dir, _STATE))
+
+        # Only removed once the new state no longer points at it
+        if previous_tail not in (None, state['tail']):
+            os.remove(os.path.join(site_dir, previous_tail))
+
+    with profiler.phase('load_nights'):
+        part_paths = [os.path.join(site_dir, part) for part in state['parts']]
+        stored = pd.DataFrame(columns=NIGHT_COLUMNS)
+        if part_paths:
+            stored = ds.dataset(part_paths, format='parquet').to_table().to_pandas()
+
+        if len(part_paths) > _MAX_PARTS:
+            state['parts'] = [f'nights_{update:05d}_merged.parquet']
+            stored.to_parquet(os.path.join(site_dir, state['parts'][0]), index=False)
+            _write_state(state, os.path.join(site_dir, _STATE))
+            for path in part_paths:
+                os.remove(path)
+
+    with profiler.phase('outlier_filter'):
+        all_nights = pd.concat([df for df in (stored, provisional) if len(df)] or [stored], ignore_index=True)
+        all_nights['Date'] = pd.to_datetime(all_nights['Date']).dt.date
+
+        moments = combine_moments(state['moments'], slope_moments(provisional['slope']))
+        slope_mean, slope_std = _mean_std(moments)
+        daily_wl = _filter_recession_days(
+            all_nights[['Date', 'water_level', 'next_date', 'slope', 'p_value']],
+            slope_mean,
+            slope_std
+        ).reset_index(drop=True)
+
+    with profiler.phase('breakpoint'):
+        break_fit = fit_breakpoint(daily_wl, n_boot=n_boot)
+
+    with profiler.phase('recession_bootstrap'):
+        recession_ci = _recession_line_ci(daily_wl, n_boot)
+
+    if profiler.enabled:
+        profiler.count('new_rows', len(new_rows))
+        profiler.count('nights_fitted', len(nights))
+
+    return HcritResult(
+        site_id=Site_ID,
+        hydrograph=segment,
+        nights=all_nights[['Date', 'next_date', 'slope', 'p_value', 'n_obs']],
+        daily_wl=daily_wl,
+        sample_nights=pd.DataFrame(columns=['Date', 'next_date', 'position', 'water_level']),
+        evening_cut=evening_cut,
+        morning_cut=morning_cut,
+        stage_filter=stage_filter,
+        h_crit=break_fit.h_crit,
+        h_crit_ci=(break_fit.lower, break_fit.upper),
+        breakpoint=break_fit,
+        recession_ci=recession_ci
+    )
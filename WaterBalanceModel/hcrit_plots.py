@@ -0,0 +1,262 @@
+"""
+Optional plotting layer for HcritResult objects.
+
+Figures are built with the object-oriented Figure API, so saving to files
+needs no GUI backend and can run in worker processes. show_diagnostics is
+the interactive counterpart used by calc_wetland_hcrit's plot flags.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+
+from WaterBalanceModel.hydrograph_h_crit import HcritResult, _night_hour_labels
+
+
+def _new_figure(figsize, interactive: bool):
+    """
+    A pyplot-managed figure for interactive use, a detached Figure otherwise
+    """
+    if interactive:
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=figsize)
+
+    return Figure(figsize=figsize)
+
+
+def plot_hydrograph(result: HcritResult, interactive: bool = False):
+    """
+    Water level time series of the well
+    """
+    fig = _new_figure((10, 5), interactive)
+    ax = fig.add_subplot()
+
+    # plot the water level time series
+    ax.plot(
+        result.hydrograph['Date'],
+        result.hydrograph['water_level'],
+        color='tab:blue',
+        label='Water Level'
+    )
+
+    # set titles and labels
+    ax.set_title(f"Hydrograph for {result.site_id}")
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Water Level (meters)')
+
+    # optional styling
+    ax.legend()
+    ax.grid(True)
+
+    fig.tight_layout()
+
+    return fig
+
+
+def plot_night(
+    combined,
+    day,
+    next_day,
+    evening_cut: int,
+    morning_cut: int,
+    interactive: bool = False
+):
+    """
+    Plot a single night of water levels with its linear fit
+    """
+    combined = np.asarray(combined, dtype=float)
+    x_indices = range(len(combined))
+    hour_labels = _night_hour_labels(evening_cut, morning_cut)
+
+    fig = _new_figure((8, 5), interactive)
+    ax = fig.add_subplot()
+    ax.plot(x_indices, combined, 'o', color='black', alpha=0.7)
+
+    z = np.polyfit(x_indices, combined, 1)
+    p = np.poly1d(z)
+    ax.plot(x_indices, p(x_indices), '-', color='red', linewidth=2)
+
+    if len(x_indices) >= len(hour_labels):
+        step = len(x_indices) // len(hour_labels)
+        if step == 0:
+            step = 1
+        tick_positions = x_indices[::step]
+        tick_labels = [f"{h:02d}:00" for h in hour_labels]
+    else:
+        # If we have fewer data points, just use all of them
+        tick_positions = list(x_indices)
+        # Create a subset of hour labels to match data points
+        label_step = len(hour_labels) // len(x_indices) if len(x_indices) > 0 else 1
+        if label_step == 0:
+            label_step = 1
+        tick_labels = [f"{hour_labels[i]:02d}:00" for i in range(0, len(hour_labels), label_step)][:len(x_indices)]
+
+    ax.set_xticks(tick_positions, tick_labels, rotation=45, ha='right')
+
+    ax.set_title(f'Night-time Water Level - Day {day} to {next_day}')
+    ax.set_xlabel('Time (Hours)')
+    ax.set_ylabel('Water Level (meters)')
+    ax.grid(True)
+
+    return fig
+
+
+def plot_sample_nights(result: HcritResult, interactive: bool = False):
+    """
+    One figure per diagnostic night kept in result.sample_nights, keyed by
+    the date the night starts on
+    """
+    figs = {}
+    for (day, next_day), night in result.sample_nights.groupby(['Date', 'next_date'], sort=False):
+        figs[day] = plot_night(
+            night.sort_values('position')['water_level'],
+            pd.Timestamp(day),
+            pd.Timestamp(next_day),
+            result.evening_cut,
+            result.morning_cut,
+            interactive=interactive
+        )
+
+    return figs
+
+
+def plot_stage_recession(result: HcritResult, interactive: bool = False):
+    """
+    Daily mean stage against night-time recession rate, coloured by date
+    """
+    daily_wl = result.daily_wl
+
+    fig = _new_figure((10, 6), interactive)
+    ax = fig.add_subplot()
+
+    # Convert dates to numerical values for coloring
+    dates = pd.to_datetime(daily_wl['Date'])
+    date_nums = mdates.date2num(dates)
+
+    scatter = ax.scatter(
+        daily_wl['water_level'],
+        daily_wl['slope'] * 1_000,
+        c=date_nums,
+        cmap='Oranges',
+        alpha=0.7,
+        edgecolor='k',
+        s=50
+    )
+
+    # Add colorbar without ticks
+    cbar = fig.colorbar(scatter, ax=ax)
+    cbar.set_label('Date')
+    cbar.set_ticks([])  # Remove ticks and numbers from the colorbar
+
+    # Linear recession fit and its bootstrap band
+    if result.recession_ci is not None:
+        band = result.recession_ci.band
+        ax.fill_between(
+            band['stage'], band['lower'] * 1_000, band['upper'] * 1_000,
+            color='tab:blue', alpha=0.15, label=f'{result.recession_ci.level:.0%} band of linear fit'
+        )
+        ax.plot(band['stage'], band['fit'] * 1_000, color='tab:blue', linewidth=1)
+        ax.legend()
+
+    # Breakpoint fit and its bootstrap interval
+    fit = result.breakpoint
+    if fit is not None and np.isfinite(fit.h_crit):
+        if np.isfinite(fit.lower):
+            ax.axvspan(fit.lower, fit.upper, color='grey', alpha=0.2, label=f'{fit.level:.0%} interval')
+        ax.axvline(fit.h_crit, color='k', linestyle='--', label=f'h_crit = {fit.h_crit:.3f} m')
+        for (intercept, slope), stages in [
+            (fit.left, [daily_wl['water_level'].min(), fit.h_crit]),
+            (fit.right, [fit.h_crit, daily_wl['water_level'].max()])
+        ]:
+            stages = np.asarray(stages)
+            ax.plot(stages, (intercept + slope * stages) * 1_000, color='k')
+        ax.legend()
+
+    ax.set_xlabel('Daily Mean Water Level (meters)')
+    ax.set_ylabel('Night-time Water Level Recession Rate (mm/hr)')
+
+    return fig
+
+
+def show_diagnostics(
+    result: HcritResult,
+    hydrograph: bool = True,
+    stage_recession: bool = True
+):
+    """
+    Display the diagnostic figures interactively
+    """
+    import matplotlib.pyplot as plt
+
+    if hydrograph:
+        plot_hydrograph(result, interactive=True)
+        plt.show()
+
+    if stage_recession:
+        for _ in plot_sample_nights(result, interactive=True).values():
+            plt.show()
+        plot_stage_recession(result, interactive=True)
+        plt.show()
+
+
+def save_diagnostics(
+    result: HcritResult,
+    out_dir: str,
+    fmt: str = 'png',
+    sample_nights: bool = True
+) -> list:
+    """
+    Write the diagnostic figures of one result to out_dir.
+
+    Parameters:
+        fmt: str - Any format matplotlib can save, e.g. 'png' or 'svg'
+        sample_nights: bool - Also write one file per diagnostic night
+
+    Returns:
+        list: Paths of the files written
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    prefix = os.path.join(out_dir, str(result.site_id).replace(' ', '_'))
+
+    figures = {
+        f'{prefix}_hydrograph.{fmt}': plot_hydrograph(result),
+        f'{prefix}_stage_recession.{fmt}': plot_stage_recession(result)
+    }
+    if sample_nights:
+        for day, fig in plot_sample_nights(result).items():
+            figures[f'{prefix}_night_{day}.{fmt}'] = fig
+
+    for path, fig in figures.items():
+        fig.savefig(path)
+
+    return list(figures)
+
+
+def render_diagnostics(
+    results: list,
+    out_dir: str,
+    fmt: str = 'png',
+    sample_nights: bool = True,
+    max_workers: int = None
+) -> list:
+    """
+    Render diagnostics for many results to files in a background process pool.
+
+    Returns immediately with one future per result; each future resolves to
+    the list of files written for that site. Call .result() on the futures
+    (or concurrent.futures.wait) to block until rendering is done.
+    """
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    futures = [
+        executor.submit(save_diagnostics, result, out_dir, fmt, sample_nights)
+        for result in results
+    ]
+    # Pending work still completes, this only stops accepting new tasks
+    executor.shutdown(wait=False)
+
+    return futures
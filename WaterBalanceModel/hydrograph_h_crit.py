@@ -1,148 +1,355 @@
 import pandas as pd
 import numpy as np
 
-from scipy.stats import linregress
-import matplotlib.pyplot as plt
-
-def calc_wetland_hcrit(
-    Site_ID: str,
-    wetland_hydrograph: pd.DataFrame,
-    plot_hydrograph: bool,
-    plot_stage_recession: bool, 
-    evening_cut: int,
-    morning_cut: int,
+from dataclasses import dataclass
+
+from scipy.stats import kendalltau, linregress, norm, theilslopes
+from scipy.stats import t as t_dist
+
+from WaterBalanceModel.breakpoint import BreakpointFit, fit_breakpoint
+from WaterBalanceModel.kernels import night_sums, resolve_backend
+from WaterBalanceModel.profiling import NULL_PROFILER
+from WaterBalanceModel.recession_bootstrap import RecessionBootstrap, bootstrap_recession_line
+
+
+# Every SAMPLE_NIGHT_EVERY-th night is kept for diagnostic plots
+SAMPLE_NIGHT_EVERY = 40
+
+# Per-night fits: ordinary least squares with its t-test p-value, or the
+# Theil-Sen slope with the Kendall tau (Mann-Kendall) p-value, which one
+# spiky sample can't drag around
+REGRESSIONS = ('ols', 'theil_sen')
+
+
+@dataclass
+class HcritResult:
+    """
+    Pure data result of calc_wetland_hcrit, plotted separately by
+    WaterBalanceModel.hcrit_plots.
+
+    Attributes:
+        site_id: str - Well the result belongs to
+        hydrograph: pd.DataFrame - Stage series the result was computed from
+        nights: pd.DataFrame - Recession fit for every night (unfiltered)
+        daily_wl: pd.DataFrame - Daily stage vs. filtered recession slope
+        sample_nights: pd.DataFrame - Samples of every 40th night, for plots
+        evening_cut, morning_cut, stage_filter - Parameters used
+        h_crit: float - Estimated spill elevation, None if not estimated
+            (NaN if the recession days don't define a break)
+        h_crit_ci: tuple - (lower, upper) bootstrap bounds of h_crit, NaN
+            unless bootstrap replicates were requested
+        breakpoint: BreakpointFit - The stage vs. recession fit h_crit comes from
+        recession_ci: RecessionBootstrap - Bootstrap intervals of the linear
+            recession rate vs. stage line, None unless bootstrap replicates
+            were requested and there are at least 3 recession days
+    """
+    site_id: str
+    hydrograph: pd.DataFrame
+    nights: pd.DataFrame
+    daily_wl: pd.DataFrame
+    sample_nights: pd.DataFrame
+    evening_cut: int
+    morning_cut: int
     stage_filter: float
-):  
-
-    if plot_hydrograph:
-        # Make a copy of the dataframe to avoid modifying the original
-        plot_df = wetland_hydrograph.copy()
-
-        fig, ax = plt.subplots(figsize=(10, 5))
-
-        # plot the water level time series
-        ax.plot(
-            plot_df['Date'], 
-            plot_df['water_level'], 
-            color='tab:blue', 
-            label='Water Level'
+    h_crit: float | None = None
+    h_crit_ci: tuple | None = None
+    breakpoint: BreakpointFit | None = None
+    recession_ci: RecessionBootstrap | None = None
+
+
+def _recession_line_ci(daily_wl: pd.DataFrame, n_boot: int):
+    """
+    Bootstrap intervals of the recession line, None without replicates or
+    with too few days to fit it
+    """
+    if not n_boot or len(daily_wl.dropna(subset=['water_level', 'slope'])) < 3:
+        return None
+    return bootstrap_recession_line(daily_wl, n_boot=n_boot)
+
+
+def _night_hour_labels(evening_cut: int, morning_cut: int) -> np.ndarray:
+    """
+    Hour labels of a complete night, from evening_cut through morning_cut
+    """
+    return np.concatenate([
+        np.arange(evening_cut, 24),
+        np.arange(0, morning_cut + 1)
+    ])
+
+
+def _assign_nights(
+    clean: pd.DataFrame,
+    evening_cut: int,
+    morning_cut: int
+):
+    """
+    Tag every night-time sample with a night id in one pass.
+
+    Nights are numbered by the observed day they start on. Evening samples
+    belong to the night of their own day, morning samples to the night of
+    the previous observed day (not necessarily the previous calendar day,
+    matching the day-by-day loop). Samples are returned grouped by night,
+    evening before morning, keeping their original order within each half.
+
+    Returns:
+        days: pd.DatetimeIndex - Observed days, in order of appearance
+        night: np.ndarray - Night id of each grouped sample
+        level: np.ndarray - Water level of each grouped sample
+        counts: np.ndarray - Number of samples in each night
+    """
+    day_codes, days = pd.factorize(clean['Date'].dt.normalize(), sort=False)
+    hour = clean['Date'].dt.hour.to_numpy()
+    water_level = clean['water_level'].to_numpy(dtype=float)
+
+    n_nights = max(len(days) - 1, 0)
+    evening = hour >= evening_cut
+    morning = hour <= morning_cut
+
+    night = np.concatenate([day_codes[evening], day_codes[morning] - 1])
+    level = np.concatenate([water_level[evening], water_level[morning]])
+
+    # The first day has no preceding night, the last day no following morning
+    keep = (night >= 0) & (night < n_nights)
+    night, level = night[keep], level[keep]
+
+    order = np.argsort(night, kind='stable')
+    night, level = night[order], level[order]
+    counts = np.bincount(night, minlength=n_nights)
+
+    return days, night, level, counts
+
+
+def _fit_nights(
+    night: np.ndarray,
+    level: np.ndarray,
+    counts: np.ndarray,
+    n_expected: int,
+    backend: str = 'numpy'
+):
+    """
+    OLS fit of water level against sample position for every night at once.
+
+    Uses grouped closed-form sums and reproduces scipy's linregress slope
+    and two-sided p-value. Nights without exactly n_expected samples get NaN.
+    """
+    n_nights = len(counts)
+    n = counts.astype(float)
+    starts = np.cumsum(counts) - counts
+    x = (np.arange(len(night)) - starts[night]).astype(float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if backend == 'numba':
+            y_mean, ssxm, ssym, ssxym = night_sums(night, level, x, n)
+        else:
+            y_mean = np.bincount(night, weights=level, minlength=n_nights) / n
+            dx = x - ((n - 1) / 2)[night]
+            dy = level - y_mean[night]
+
+            ssxm = np.bincount(night, weights=dx * dx, minlength=n_nights)
+            ssym = np.bincount(night, weights=dy * dy, minlength=n_nights)
+            ssxym = np.bincount(night, weights=dx * dy, minlength=n_nights)
+
+        slope = ssxym / ssxm
+        r = np.where(
+            (ssxm == 0) | (ssym == 0),
+            0.0,
+            np.clip(ssxym / np.sqrt(ssxm * ssym), -1.0, 1.0)
         )
 
-        # set titles and labels
-        ax.set_title(f"Hydrograph for {Site_ID}")
-        ax.set_xlabel('Date')
-        ax.set_ylabel('Water Level (meters)')
-
-        # optional styling
-        ax.legend()
-        ax.grid(True)
-
-        # adjust layout and show
-        plt.tight_layout()
-        plt.show()
-
-    # Take above-ground night-time data to calculate recession rate
-    clean = wetland_hydrograph[wetland_hydrograph['water_level'] >= stage_filter]
-    night_mask = (clean['Date'].dt.hour >= evening_cut) | (clean['Date'].dt.hour <= morning_cut)
-    clean = clean[night_mask]
-
-    days = clean['Date'].dt.strftime('%Y-%m-%d').unique()
-
-    # Empty df to store results
-    results_df = pd.DataFrame(
-        columns=['Date', 'next_date', 'slope']
-    )
-
-    for i in range(len(days) - 1):  # Fixed: use range() and subtract 1 to avoid index error
-        
-        day = pd.to_datetime(days[i])
-        next_day = pd.to_datetime(days[i + 1])
-
-        evening = clean[
-            (clean['Date'].dt.date == day.date()) & 
-            (clean['Date'].dt.hour >= evening_cut)
-        ]
-        
-        morning = clean[
-            (clean['Date'].dt.date == next_day.date()) &  
-            (clean['Date'].dt.hour <= morning_cut)
-        ]
-        
-        combined = pd.concat([evening, morning])['water_level'].reset_index(drop=True)
+        # Same small constant linregress uses to avoid dividing by zero at |r| = 1
+        TINY = 1.0e-20
+        df = n - 2
+        t_stat = r * np.sqrt(df / ((1.0 - r + TINY) * (1.0 + r + TINY)))
+        p_value = 2 * t_dist.sf(np.abs(t_stat), df)
+
+    # Two points always fit exactly, linregress special-cases them
+    if n_expected == 2:
+        pairs = np.flatnonzero(counts == 2)
+        p_value[pairs] = np.where(level[starts[pairs]] == level[starts[pairs] + 1], 1.0, 0.0)
+
+    valid = (counts == n_expected) & (counts >= 2)
+    slope = np.where(valid, slope, np.nan)
+    p_value = np.where(valid, p_value, np.nan)
+
+    return slope, p_value
+
+
+def _fit_nights_theil_sen(
+    night: np.ndarray,
+    level: np.ndarray,
+    counts: np.ndarray,
+    n_expected: int
+):
+    """
+    Theil-Sen slope and Kendall tau p-value of every night at once.
+
+    Complete nights are stacked into an (nights, n_expected) matrix, so the
+    pairwise slopes and signs of all nights are a few array operations.
+    Reproduces scipy's theilslopes slope and kendalltau's asymptotic
+    two-sided p-value (with the tie correction). Nights without exactly
+    n_expected samples get NaN.
+    """
+    slope = np.full(len(counts), np.nan)
+    p_value = np.full(len(counts), np.nan)
+
+    valid = np.flatnonzero((counts == n_expected) & (counts >= 2))
+    if len(valid) == 0:
+        return slope, p_value
+
+    starts = np.cumsum(counts) - counts
+    y = level[starts[valid][:, None] + np.arange(n_expected)]
+
+    i, j = np.triu_indices(n_expected, 1)
+    diff = y[:, j] - y[:, i]
+    slope[valid] = np.median(diff / (j - i), axis=1)
+
+    # Mann-Kendall statistic; positions never tie, tied levels reduce the variance
+    s = np.sign(diff).sum(axis=1)
+    tie_size = (y[:, :, None] == y[:, None, :]).sum(axis=2)
+    tie_term = ((tie_size - 1) * (2 * tie_size + 5)).sum(axis=1)
+
+    n = n_expected
+    var = (n * (n - 1) * (2 * n + 5) - tie_term) / 18
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # All-equal nights have no ranking, kendalltau gives NaN too
+        p_value[valid] = np.where(var > 0, 2 * norm.sf(np.abs(s / np.sqrt(var))), np.nan)
+
+    return slope, p_value
+
+
+def _recession_slopes_vectorized(
+    clean: pd.DataFrame,
+    evening_cut: int,
+    morning_cut: int,
+    backend: str = 'numpy',
+    profiler=NULL_PROFILER,
+    regression: str = 'ols'
+):
+    """
+    Night-time recession slopes for every night from one grouped pass.
+
+    Returns the per-night fits and the samples of the diagnostic nights.
+    """
+    n_expected = len(_night_hour_labels(evening_cut, morning_cut))
+    with profiler.phase('assign_nights'):
+        days, night, level, counts = _assign_nights(clean, evening_cut, morning_cut)
+    with profiler.phase('regression'):
+        if regression == 'theil_sen':
+            slope, p_value = _fit_nights_theil_sen(night, level, counts, n_expected)
+        else:
+            slope, p_value = _fit_nights(night, level, counts, n_expected, backend)
+
+    with profiler.phase('night_tables'):
+        night_dates = days[:-1].date
+        next_dates = days[1:].strftime('%Y-%m-%d')
+
+        nights = pd.DataFrame({
+            'Date': night_dates,
+            'next_date': next_dates,
+            'slope': slope,
+            'p_value': p_value,
+            'n_obs': counts
+        })
+
+        n_nights = len(counts)
+        sampled = (np.arange(n_nights) % SAMPLE_NIGHT_EVERY == 0) & (counts > 2)
+        in_sample = sampled[night]
+        starts = np.cumsum(counts) - counts
+        sample_night = night[in_sample]
+
+        sample_nights = pd.DataFrame({
+            'Date': night_dates[sample_night],
+            'next_date': next_dates[sample_night],
+            'position': np.flatnonzero(in_sample) - starts[sample_night],
+            'water_level': level[in_sample]
+        })
+
+    return nights, sample_nights
+
+
+def _recession_slopes_loop(
+    clean: pd.DataFrame,
+    evening_cut: int,
+    morning_cut: int,
+    regression: str = 'ols'
+):
+    """
+    Reference day-by-day implementation, one linregress per night.
+
+    Row positions for each day are looked up once and results are written
+    into preallocated arrays, so the loop stays linear in record length.
+    """
+    day_strings = clean['Date'].dt.strftime('%Y-%m-%d')
+    days = day_strings.unique()
+    day_rows = day_strings.reset_index(drop=True).groupby(day_strings.to_numpy(), sort=False).indices
+    hour = clean['Date'].dt.hour.to_numpy()
+    water_level = clean['water_level'].to_numpy(dtype=float)
+    hour_labels = _night_hour_labels(evening_cut, morning_cut)
+
+    # Preallocated result columns, materialized into a frame once at the end
+    n_nights = max(len(days) - 1, 0)
+    slopes = np.full(n_nights, np.nan)
+    p_values = np.full(n_nights, np.nan)
+    n_obs = np.zeros(n_nights, dtype=int)
+    night_dates = pd.to_datetime(days[:n_nights]).date
+    samples = []
+
+    for i in range(n_nights):
+
+        evening = day_rows[days[i]]
+        evening = evening[hour[evening] >= evening_cut]
+
+        morning = day_rows[days[i + 1]]
+        morning = morning[hour[morning] <= morning_cut]
+
+        combined = water_level[np.concatenate([evening, morning])]
         x_indices = range(len(combined))
-        hour_labels = np.concatenate([
-                np.arange(evening_cut, 24), 
-                np.arange(0, morning_cut + 1)  
-            ])
-
-        if i % 40 == 0 and len(combined) > 2:
-
-            plt.figure(figsize=(8, 5))
-            plt.plot(x_indices, combined, 'o', color='black', alpha=0.7)
-
-            z = np.polyfit(x_indices, combined, 1)
-            p = np.poly1d(z)
-            plt.plot(x_indices, p(x_indices), '-', color='red', linewidth=2)
-
-            if len(x_indices) >= len(hour_labels):
-                step = len(x_indices) // len(hour_labels)
-                if step == 0:
-                    step = 1
-                tick_positions = x_indices[::step]
-                tick_labels = [f"{h:02d}:00" for h in hour_labels]
-            else:
-                # If we have fewer data points, just use all of them
-                tick_positions = list(x_indices)
-                # Create a subset of hour labels to match data points
-                label_step = len(hour_labels) // len(x_indices) if len(x_indices) > 0 else 1
-                if label_step == 0:
-                    label_step = 1
-                tick_labels = [f"{hour_labels[i]:02d}:00" for i in range(0, len(hour_labels), label_step)][:len(x_indices)]
-
-            plt.xticks(tick_positions, tick_labels, rotation=45, ha='right')
-
-            plt.title(f'Night-time Water Level - Day {day} to {next_day}')
-            plt.xlabel('Time (Hours)')
-            plt.ylabel('Water Level (meters)')
-            plt.grid(True)
-            plt.show()
+        n_obs[i] = len(combined)
+
+        if i % SAMPLE_NIGHT_EVERY == 0 and len(combined) > 2:
+            samples.append(pd.DataFrame({
+                'Date': night_dates[i],
+                'next_date': days[i + 1],
+                'position': np.arange(len(combined)),
+                'water_level': combined
+            }))
 
         # Make a linear fit to estimate night-time recession m/hr
         if len(combined) == len(hour_labels) and len(combined) >= 2:
-            result = linregress(
-                x_indices,
-                combined
-            )
-            slope = result.slope
-            p_value = result.pvalue
-        else:
-            slope = None
-            p_value = None
-
-        results_df = pd.concat([
-            results_df,
-            pd.DataFrame({
-                'Date': [day.strftime('%Y-%m-%d')],
-                'next_date': [next_day.strftime('%Y-%m-%d')],
-                'slope': [slope],
-                'p_value': [p_value]
-            })
-        ], ignore_index=True)
-
-
-    results_df['Date'] = pd.to_datetime(results_df['Date']).dt.date
-
-    daily_wl = wetland_hydrograph.groupby(wetland_hydrograph['Date'].dt.date).agg(
-        {'water_level': 'mean'}
-    ).reset_index()
-
-    daily_wl = pd.merge(daily_wl, results_df, on='Date', how='left')
-
-
-    # Filter based on two standard deviations from the mean
-    slope_mean = daily_wl['slope'].mean()
-    slope_std = daily_wl['slope'].std()
-
+            if regression == 'theil_sen':
+                slopes[i] = theilslopes(combined, x_indices).slope
+                p_values[i] = kendalltau(x_indices, combined, method='asymptotic').pvalue
+            else:
+                result = linregress(
+                    x_indices,
+                    combined
+                )
+                slopes[i] = result.slope
+                p_values[i] = result.pvalue
+
+    nights = pd.DataFrame({
+        'Date': night_dates,
+        'next_date': days[1:],
+        'slope': slopes,
+        'p_value': p_values,
+        'n_obs': n_obs
+    })
+
+    if samples:
+        sample_nights = pd.concat(samples, ignore_index=True)
+    else:
+        sample_nights = pd.DataFrame(columns=['Date', 'next_date', 'position', 'water_level'])
+
+    return nights, sample_nights
+
+
+def _filter_recession_days(daily_wl: pd.DataFrame, slope_mean: float, slope_std: float) -> pd.DataFrame:
+    """
+    Keep the days whose night recession is usable for h_crit.
+
+    slope_mean and slope_std describe every fitted night, so incremental
+    updates can pass them from stored running moments.
+    """
     # Keep only values within 2 standard deviations
     daily_wl = daily_wl[(daily_wl['slope'] >= slope_mean - 2*slope_std) & 
                         (daily_wl['slope'] <= slope_mean + 2*slope_std)]
@@ -152,33 +359,135 @@ def calc_wetland_hcrit(
                         (daily_wl['slope'] * 1_000 >= -1.5)]
     daily_wl = daily_wl[daily_wl['water_level'] > 0]
     daily_wl = daily_wl[daily_wl['p_value'] < 0.3]
-    
-    if plot_stage_recession:
-        import matplotlib.dates as mdates
-
-        plt.figure(figsize=(10, 6))
-
-        # Convert dates to numerical values for coloring
-        dates = pd.to_datetime(daily_wl['Date'])
-        date_nums = mdates.date2num(dates)
-
-        scatter = plt.scatter(
-            daily_wl['water_level'], 
-            daily_wl['slope'] * 1_000,
-            c=date_nums,
-            cmap='Oranges',
-            alpha=0.7,
-            edgecolor='k',
-            s=50
+
+    return daily_wl
+
+
+def calc_wetland_hcrit(
+    Site_ID: str,
+    wetland_hydrograph: pd.DataFrame,
+    plot_hydrograph: bool,
+    plot_stage_recession: bool, 
+    evening_cut: int,
+    morning_cut: int,
+    stage_filter: float,
+    engine: str = "vectorized",
+    backend: str = "numpy",
+    profiler=NULL_PROFILER,
+    regression: str = "ols",
+    n_boot: int = 0
+) -> HcritResult:  
+    """
+    Estimate night-time recession rates against daily stage for one well.
+
+    The computation never touches matplotlib. The plot flags display the
+    diagnostics interactively afterwards; for batch runs leave them off and
+    render the returned result with hcrit_plots.render_diagnostics instead.
+
+    Parameters:
+        plot_hydrograph: bool - Show the hydrograph
+        plot_stage_recession: bool - Show sample nights and the stage vs.
+            recession scatter
+        evening_cut: int - First hour of the night window
+        morning_cut: int - Last hour of the night window (next morning)
+        stage_filter: float - Minimum water level used for recession fits
+        engine: str - 'vectorized' fits all nights in one grouped pass,
+            'loop' is the day-by-day linregress reference implementation
+        backend: str - Kernel for the vectorized engine's regression sums:
+            'numpy', 'numba' or 'auto' (numba when installed); the loop
+            engine only accepts 'numpy'
+        profiler: profiling.Profiler - Records per-phase times and counts
+            (rows, nights fitted and rejected); off by default
+        regression: str - Per-night fit, 'ols' or 'theil_sen' (robust to
+            spikes; its p-value is Kendall's tau test, filtered with the
+            same p < 0.3). backend only affects 'ols'
+        n_boot: int - Block-bootstrap replicates of the h_crit interval (see
+            breakpoint.fit_breakpoint) and of the recession line's
+            intervals (recession_bootstrap). 0, the default, gives the point
+            estimates only; 1000 replicates take about 0.1 s for 300
+            recession days
+
+    Returns:
+        HcritResult: Per-night fits, the filtered daily_wl table and h_crit
+            from its stage vs. recession breakpoint
+    """
+
+    if regression not in REGRESSIONS:
+        raise ValueError(f"Unknown regression: {regression}. Available regressions: {list(REGRESSIONS)}")
+    if engine == "loop" and backend != "numpy":
+        raise ValueError(f"backend={backend!r} needs engine='vectorized'; the loop engine only runs scipy")
+
+    # Take above-ground night-time data to calculate recession rate
+    with profiler.phase('filter'):
+        clean = wetland_hydrograph[wetland_hydrograph['water_level'] >= stage_filter]
+        night_mask = (clean['Date'].dt.hour >= evening_cut) | (clean['Date'].dt.hour <= morning_cut)
+        clean = clean[night_mask]
+
+    if engine == "vectorized":
+        nights, sample_nights = _recession_slopes_vectorized(
+            clean, evening_cut, morning_cut, resolve_backend(backend), profiler, regression
+        )
+    elif engine == "loop":
+        with profiler.phase('night_loop'):
+            nights, sample_nights = _recession_slopes_loop(clean, evening_cut, morning_cut, regression)
+    else:
+        raise ValueError(f"Unknown engine: {engine}. Available engines: 'vectorized', 'loop'")
+
+    with profiler.phase('daily_mean'):
+        daily_wl = wetland_hydrograph.groupby(wetland_hydrograph['Date'].dt.date).agg(
+            {'water_level': 'mean'}
+        ).reset_index()
+
+    with profiler.phase('merge'):
+        daily_wl = pd.merge(
+            daily_wl,
+            nights[['Date', 'next_date', 'slope', 'p_value']],
+            on='Date',
+            how='left'
         )
 
-        # Add colorbar without ticks
-        cbar = plt.colorbar(scatter)
-        cbar.set_label('Date')
-        cbar.set_ticks([])  # Remove ticks and numbers from the colorbar
+    n_fitted = daily_wl['slope'].notna().sum() if profiler.enabled else 0
+
+    with profiler.phase('outlier_filter'):
+        daily_wl = _filter_recession_days(daily_wl, daily_wl['slope'].mean(), daily_wl['slope'].std())
+
+    if profiler.enabled:
+        profiler.count('rows', len(wetland_hydrograph))
+        profiler.count('night_rows', len(clean))
+        profiler.count('nights', len(nights))
+        profiler.count('nights_fitted', int(n_fitted))
+        profiler.count('nights_rejected', int(n_fitted - len(daily_wl)))
+
+    with profiler.phase('breakpoint'):
+        break_fit = fit_breakpoint(daily_wl, n_boot=n_boot)
+
+    with profiler.phase('recession_bootstrap'):
+        recession_ci = _recession_line_ci(daily_wl, n_boot)
+
+    result = HcritResult(
+        site_id=Site_ID,
+        hydrograph=wetland_hydrograph,
+        nights=nights,
+        daily_wl=daily_wl,
+        sample_nights=sample_nights,
+        evening_cut=evening_cut,
+        morning_cut=morning_cut,
+        stage_filter=stage_filter,
+        h_crit=break_fit.h_crit,
+        h_crit_ci=(break_fit.lower, break_fit.upper),
+        breakpoint=break_fit,
+        recession_ci=recession_ci
+    )
+
+    if plot_hydrograph or plot_stage_recession:
+        # Imported here so headless runs never load matplotlib
+        from WaterBalanceModel.hcrit_plots import show_diagnostics
 
-        plt.xlabel('Daily Mean Water Level (meters)')
-        plt.ylabel('Night-time Water Level Recession Rate (mm/hr)')
+        with profiler.phase('plot'):
+            show_diagnostics(
+                result,
+                hydrograph=plot_hydrograph,
+                stage_recession=plot_stage_recession
+            )
 
-        
-        
+    return result
@@ -0,0 +1,182 @@
+"""
+Stage-area-volume (hypsometric) tables of wetland basins from a DEM. The
+basin's cell elevations are sorted once and cumulative sums give inundated
+area and storage at every stage of a dense grid; model timesteps then only
+interpolate the table.
+"""
+
+from dataclasses import dataclass
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from WaterBalanceModel.dem_h_crit import _basin_window
+
+
+@dataclass
+class Hypsometry:
+    """
+    Stage -> inundated area and storage volume of one basin.
+
+    Stage is measured from the basin's lowest DEM cell, like DEM h_crit.
+
+    Attributes:
+        site_id: Wetland ID
+        stage: np.ndarray - Evenly spaced stages, starting at 0
+        area: np.ndarray - Inundated area at each stage (DEM units squared)
+        volume: np.ndarray - Stored volume below each stage
+        bottom_elevation: float - DEM elevation of stage 0
+        basin_area: float - Area of all valid basin cells
+    """
+    site_id: str
+    stage: np.ndarray
+    area: np.ndarray
+    volume: np.ndarray
+    bottom_elevation: float
+    basin_area: float
+
+    def area_at(self, stage) -> np.ndarray:
+        """
+        Inundated area at any array of stages (0 below the bottom, the whole
+        basin above the table)
+        """
+        return np.interp(stage, self.stage, self.area, left=0.0, right=self.basin_area)
+
+    def volume_at(self, stage) -> np.ndarray:
+        """
+        Storage at any array of stages; above the table the whole basin fills
+        """
+        stage = np.asarray(stage, dtype=float)
+        top = self.stage[-1]
+        volume = np.interp(stage, self.stage, self.volume, left=0.0)
+        return np.where(stage > top, self.volume[-1] + self.basin_area * (stage - top), volume)
+
+    def stage_at_volume(self, volume) -> np.ndarray:
+        """
+        Inverse lookup: stage holding a given storage (volume is non-decreasing)
+        """
+        volume = np.asarray(volume, dtype=float)
+        top = self.stage[-1]
+        stage = np.interp(volume, self.volume, self.stage, left=0.0)
+        return np.where(volume > self.volume[-1], top + (volume - self.volume[-1]) / self.basin_area, stage)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            'Site_ID': self.site_id,
+            'stage': self.stage.astype('float32'),
+            'area': self.area.astype('float32'),
+            'volume': self.volume.astype('float32'),
+            'bottom_elevation': np.float32(self.bottom_elevation),
+            'basin_area': np.float32(self.basin_area)
+        })
+
+
+def hypsometry_from_elevations(
+    site_id: str,
+    elevations: np.ndarray,
+    cell_area: float,
+    step: float = 0.01,
+    max_stage: float = None
+) -> Hypsometry:
+    """
+    Stage-area-volume table from a basin's cell elevations.
+
+    With the elevations sorted (z_1 <= ... <= z_n) and k cells at or below
+    elevation E, area(E) = k * cell_area and volume(E) = cell_area *
+    (k * E - (z_1 + ... + z_k)), so one sort and one cumulative sum give the
+    exact table at every grid stage.
+
+    Parameters:
+        elevations: np.ndarray - Valid DEM values of the basin's cells
+        cell_area: float - Area of one cell
+        step: float - Stage spacing of the table (DEM units)
+        max_stage: float - Top of the table, defaults to the basin's relief
+    """
+    z = np.sort(np.asarray(elevations, dtype=float).ravel())
+    if len(z) == 0:
+        raise ValueError(f"No valid DEM cells for {site_id}")
+    cum_z = np.concatenate([[0.0], np.cumsum(z - z[0])])
+
+    if max_stage is None:
+        max_stage = z[-1] - z[0]
+    stage = np.arange(0.0, max_stage + step, step)
+
+    # Relative to the bottom so the cumulative sums keep their precision
+    k = np.searchsorted(z - z[0], stage, side='right')
+    area = k * cell_area
+    volume = cell_area * (k * stage - cum_z[k])
+
+    return Hypsometry(
+        site_id=site_id,
+        stage=stage,
+        area=area,
+        volume=volume,
+        bottom_elevation=float(z[0]),
+        basin_area=len(z) * cell_area
+    )
+
+
+def calc_hypsometry(
+    Site_ID: str,
+    wetland_basin: gpd.GeoDataFrame,
+    dem_path: str,
+    step: float = 0.01,
+    max_stage: float = None
+) -> Hypsometry:
+    """
+    Stage-area-volume table of a wetland basin from a windowed DEM read.
+
+    Parameters:
+        wetland_basin: gpd.GeoDataFrame - The wetland's basin polygon(s)
+        dem_path: str - DEM in a projected CRS (cell areas must be uniform)
+    """
+    import rasterio
+
+    with rasterio.open(dem_path) as src:
+        if src.crs.is_geographic:
+            raise ValueError("The DEM must be in a projected CRS")
+        geom = wetland_basin.to_crs(src.crs).geometry.union_all()
+        window, inside = _basin_window(src, geom)
+        dem = src.read(1, window=window, masked=True).astype('float64').filled(np.nan)
+        cell_area = abs(src.transform.a * src.transform.e)
+
+    elevations = dem[inside]
+    return hypsometry_from_elevations(
+        Site_ID,
+        elevations[~np.isnan(elevations)],
+        cell_area,
+        step=step,
+        max_stage=max_stage
+    )
+
+
+def hypsometry_table(
+    basins: gpd.GeoDataFrame,
+    dem_path: str,
+    step: float = 0.01,
+    id_col: str = 'Site_ID'
+) -> pd.DataFrame:
+    """
+    Long float32 table (Site_ID, stage, area, volume, ...) for every basin,
+    compact enough to store as Parquet and reload with from_table
+    """
+    return pd.concat([
+        calc_hypsometry(site_id, basins[basins[id_col] == site_id], dem_path, step=step).to_frame()
+        for site_id in basins[id_col].unique()
+    ], ignore_index=True)
+
+
+def from_table(table: pd.DataFrame, site_id: str) -> Hypsometry:
+    """
+    Hypsometry of one site from a hypsometry_table frame
+    """
+    site = table[table['Site_ID'] == site_id].sort_values('stage')
+    return Hypsometry(
+        site_id=site_id,
+        stage=site['stage'].to_numpy(dtype=float),
+        area=site['area'].to_numpy(dtype=float),
+        volume=site['volume'].to_numpy(dtype=float),
+        bottom_elevation=float(site['bottom_elevation'].iloc[0]),
+        basin_area=float(site['basin_area'].iloc[0])
+    )
@@ -0,0 +1,213 @@
+"""
+Optional Numba-compiled kernels for the sequential numeric loops: grouped
+night regression sums, the daily water-balance time step and the DEM
+priority flood. Each kernel performs the same floating-point operations in
+the same order as its NumPy counterpart, so both backends give identical
+results. Without numba installed, backend='auto' falls back to NumPy.
+"""
+
+import math
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKENDS = ('numpy', 'numba', 'auto')
+
+
+def resolve_backend(backend: str) -> str:
+    """
+    'numpy' or 'numba' for a requested backend ('auto' prefers numba)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Available backends: {list(BACKENDS)}")
+    if backend == 'auto':
+        return 'numba' if numba is not None else 'numpy'
+    if backend == 'numba' and numba is None:
+        raise ImportError("backend='numba' needs numba installed, use 'numpy' or 'auto'")
+    return backend
+
+
+def _jit(func):
+    # Compiled on first call; left as plain Python when numba is missing
+    # (resolve_backend never selects it then)
+    if numba is None:
+        return func
+    return numba.njit(cache=True)(func)
+
+
+@_jit
+def night_sums(night, level, x, n):
+    """
+    Per-night mean level and the centred sums of squares and cross-products
+    (ssxm, ssym, ssxym) of the night regressions, in two passes over the
+    samples instead of four bincounts and their temporaries
+    """
+    n_nights = n.shape[0]
+    y_sum = np.zeros(n_nights)
+    for i in range(night.shape[0]):
+        y_sum[night[i]] += level[i]
+    y_mean = y_sum / n
+
+    ssxm = np.zeros(n_nights)
+    ssym = np.zeros(n_nights)
+    ssxym = np.zeros(n_nights)
+    for i in range(night.shape[0]):
+        k = night[i]
+        dx = x[i] - (n[k] - 1) / 2
+        dy = level[i] - y_mean[k]
+        ssxm[k] += dx * dx
+        ssym[k] += dy * dy
+        ssxym[k] += dx * dy
+
+    return y_mean, ssxm, ssym, ssxym
+
+
+@_jit
+def _storage_from_stage(h, sy_soil, sy_ramp, min_ramp):
+    ramp = max(sy_ramp, min_ramp)
+    below = sy_soil * min(h, 0.0)
+    ponded = min(max(h, 0.0), ramp)
+    on_ramp = sy_soil * ponded + (1 - sy_soil) * (ponded * ponded) / (2 * ramp)
+    return below + on_ramp + max(h - ramp, 0.0)
+
+
+@_jit
+def _stage_from_storage(storage, sy_soil, sy_ramp, min_ramp):
+    ramp = max(sy_ramp, min_ramp)
+    if storage <= 0:
+        return storage / sy_soil
+    ramp_storage = (1 + sy_soil) * ramp / 2
+    if storage > ramp_storage:
+        return ramp + storage - ramp_storage
+    a = (1 - sy_soil) / (2 * ramp)
+    return 2 * storage / (sy_soil + math.sqrt(sy_soil * sy_soil + 4 * a * storage))
+
+
+@_jit
+def simulate_days(precip, pet, h0, h_crit, et_scale, et_extinction, sy_soil, sy_ramp, leak,
+                  min_ramp, stage, et, discharge):
+    """
+    Daily time step of simulate.simulate_stage for every batch member,
+    filling the (time, batch) stage, et and discharge arrays in place.
+    precip and pet are (time, batch) or (time, 1).
+    """
+    n_time, n_batch = stage.shape
+    shared_precip = precip.shape[1] == 1
+    shared_pet = pet.shape[1] == 1
+
+    h = np.empty(n_batch)
+    storage = np.empty(n_batch)
+    spill_storage = np.empty(n_batch)
+    for b in range(n_batch):
+        h[b] = min(h0[b], h_crit[b])
+        storage[b] = _storage_from_stage(h[b], sy_soil[b], sy_ramp[b], min_ramp)
+        spill_storage[b] = _storage_from_stage(h_crit[b], sy_soil[b], sy_ramp[b], min_ramp)
+
+    # Day-major like the NumPy loop, so each day writes one contiguous row
+    for t in range(n_time):
+        for b in range(n_batch):
+            p = precip[t, 0] if shared_precip else precip[t, b]
+            e = pet[t, 0] if shared_pet else pet[t, b]
+
+            et[t, b] = e * et_scale[b] * min(max(1 + h[b] / et_extinction[b], 0.0), 1.0)
+            s = storage[b] + p - et[t, b] - leak[b]
+
+            discharge[t, b] = max(s - spill_storage[b], 0.0)
+            s = s - discharge[t, b]
+
+            storage[b] = s
+            h[b] = _stage_from_storage(s, sy_soil[b], sy_ramp[b], min_ramp)
+            stage[t, b] = h[b]
+
+
+@_jit
+def _before(z_a, i_a, z_b, i_b):
+    # Heap order: elevation, then row-major position (as heapq on (z, r, c))
+    return z_a < z_b or (z_a == z_b and i_a < i_b)
+
+
+@_jit
+def priority_flood(dem, inside, seed_r, seed_c):
+    """
+    Priority flood of dem_h_crit.spill_elevation on an in-memory window,
+    with an array binary heap. NaN cells are outlets. Returns (reached_edge,
+    level, rim_r, rim_c, n_flooded); reached_edge means the flood needs
+    cells beyond the window, and the other values are then meaningless.
+    """
+    n_rows, n_cols = dem.shape
+    visited = np.zeros((n_rows, n_cols), dtype=np.bool_)
+    heap_z = np.empty(n_rows * n_cols)
+    heap_i = np.empty(n_rows * n_cols, dtype=np.int64)
+
+    level = dem[seed_r, seed_c]
+    rim_r, rim_c = seed_r, seed_c
+    visited[seed_r, seed_c] = True
+    heap_z[0] = level
+    heap_i[0] = seed_r * n_cols + seed_c
+    size = 1
+    n_flooded = 0
+
+    while size > 0:
+        z = heap_z[0]
+        idx = heap_i[0]
+        # Pop: move the last item to the root and sift it down
+        size -= 1
+        last_z, last_i = heap_z[size], heap_i[size]
+        pos = 0
+        while True:
+            child = 2 * pos + 1
+            if child >= size:
+                break
+            if child + 1 < size and _before(heap_z[child + 1], heap_i[child + 1], heap_z[child], heap_i[child]):
+                child += 1
+            if not _before(heap_z[child], heap_i[child], last_z, last_i):
+                break
+            heap_z[pos], heap_i[pos] = heap_z[child], heap_i[child]
+            pos = child
+        heap_z[pos], heap_i[pos] = last_z, last_i
+
+        r, c = idx // n_cols, idx % n_cols
+        n_flooded += 1
+
+        # Descending the far side of the rim: the basin overflows at level
+        if z < level and not inside[r, c]:
+            break
+        if z > level:
+            level, rim_r, rim_c = z, r, c
+
+        outlet = False
+        for dr in range(-1, 2):
+            for dc in range(-1, 2):
+                if dr == 0 and dc == 0:
+                    continue
+                nr, nc = r + dr, c + dc
+                if nr < 0 or nr >= n_rows or nc < 0 or nc >= n_cols:
+                    return True, level, rim_r, rim_c, n_flooded
+                if visited[nr, nc]:
+                    continue
+                visited[nr, nc] = True
+                nz = dem[nr, nc]
+                if math.isnan(nz):
+                    outlet = True
+                    continue
+
+                # Push and sift up
+                ni = nr * n_cols + nc
+                pos = size
+                size += 1
+                while pos > 0:
+                    parent = (pos - 1) // 2
+                    if not _before(nz, ni, heap_z[parent], heap_i[parent]):
+                        break
+                    heap_z[pos], heap_i[pos] = heap_z[parent], heap_i[parent]
+                    pos = parent
+                heap_z[pos], heap_i[pos] = nz, ni
+
+        if outlet:
+            break
+
+    return False, level, rim_r, rim_c, n_flooded
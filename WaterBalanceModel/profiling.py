@@ -0,0 +1,159 @@
+"""
+Lightweight per-phase instrumentation: wall time, call counts, counters
+and (optionally) peak memory of named phases. Code under instrumentation
+takes a profiler argument that defaults to NULL_PROFILER, whose phases and
+counters do nothing, so profiling is off by default at near-zero cost.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+_NULL_CONTEXT = nullcontext()
+
+
+class Profiler:
+    """
+    Records phases and counters for one site.
+
+    Parameters:
+        site_id: Site the report belongs to
+        memory: bool - Also record each phase's peak memory above its
+            starting usage (tracemalloc, noticeably slower)
+
+    Usage:
+        profiler = Profiler('3_638')
+        with profiler.phase('filter'):
+            ...
+        profiler.count('nights_fitted', 120)
+        profiler.report()
+    """
+
+    enabled = True
+
+    def __init__(self, site_id=None, memory: bool = False):
+        self.site_id = site_id
+        self.memory = memory
+        self.phases = {}
+        self.counters = {}
+        # Absolute traced-memory peaks of the open phases, innermost last
+        self._peaks = []
+        self._owns_tracing = False
+
+    @contextmanager
+    def phase(self, name: str):
+        start_memory = self._enter_memory() if self.memory else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stats = self.phases.setdefault(name, {'seconds': 0.0, 'calls': 0, 'peak_mb': None})
+            stats['seconds'] += seconds
+            stats['calls'] += 1
+            if self.memory:
+                peak_mb = (self._exit_memory() - start_memory) / 2 ** 20
+                stats['peak_mb'] = max(stats['peak_mb'] or 0.0, peak_mb)
+
+    def _enter_memory(self) -> int:
+        if not self._peaks:
+            # Only stop tracing afterwards if this profiler started it
+            self._owns_tracing = not tracemalloc.is_tracing()
+            if self._owns_tracing:
+                tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._peaks:
+            # Fold the peak so far into the enclosing phase before resetting it
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        tracemalloc.reset_peak()
+        self._peaks.append(current)
+        return current
+
+    def _exit_memory(self) -> int:
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(self._peaks.pop(), peak)
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+        elif self._owns_tracing:
+            tracemalloc.stop()
+        return peak
+
+    def count(self, name: str, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> dict:
+        return {
+            'site_id': self.site_id,
+            'phases': {name: dict(stats) for name, stats in self.phases.items()},
+            'counters': dict(self.counters)
+        }
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        One row per phase (Site_ID, phase, seconds, calls, peak_mb)
+        """
+        return report_frame(self.report())
+
+
+class _NullProfiler:
+    """
+    Stand-in used when profiling is off: every call is a no-op
+    """
+
+    enabled = False
+
+    def phase(self, name: str):
+        return _NULL_CONTEXT
+
+    def count(self, name: str, value=1):
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+def report_frame(report: dict) -> pd.DataFrame:
+    """
+    A Profiler.report() as one row per phase
+    """
+    rows = [
+        {'Site_ID': report['site_id'], 'phase': name, **stats}
+        for name, stats in report['phases'].items()
+    ]
+    return pd.DataFrame(rows, columns=['Site_ID', 'phase', 'seconds', 'calls', 'peak_mb'])
+
+
+def aggregate_reports(reports):
+    """
+    Combine per-site reports (e.g. from a batch run).
+
+    Returns:
+        phases: pd.DataFrame - Per phase: total, mean and max seconds, the
+            slowest site, calls, largest peak memory and share of total time
+        counters: pd.DataFrame - One row per site with its counters
+    """
+    reports = list(reports)
+    counters = pd.DataFrame(
+        [{'Site_ID': report['site_id'], **report['counters']} for report in reports]
+    )
+
+    frame = pd.concat([report_frame(report) for report in reports] or [report_frame({'site_id': None, 'phases': {}})],
+                      ignore_index=True)
+    if frame.empty:
+        return frame, counters
+
+    grouped = frame.groupby('phase', sort=False)
+    phases = grouped.agg(
+        total_seconds=('seconds', 'sum'),
+        mean_seconds=('seconds', 'mean'),
+        max_seconds=('seconds', 'max'),
+        calls=('calls', 'sum'),
+        peak_mb=('peak_mb', 'max')
+    )
+    phases['slowest_site'] = frame.loc[grouped['seconds'].idxmax(), 'Site_ID'].to_numpy()
+    phases['share'] = phases['total_seconds'] / phases['total_seconds'].sum()
+
+    return phases.sort_values('total_seconds', ascending=False).reset_index(), counters
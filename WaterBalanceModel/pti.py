@@ -0,0 +1,218 @@
+"""
+Proportion Time Inundated (PTI) before and after a split date, for many
+wells and split dates at once.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class InundationIndex:
+    """
+    Daily stage sorted by well and date once, with a prefix sum of inundated
+    days. Observation and inundation counts before/after any split date are
+    then two searchsorted lookups, for any number of (well, date) queries.
+
+    Parameters:
+        wl_daily: pd.DataFrame - Daily stage table (Date at day resolution)
+        well_col: str - Column holding the well id
+        stage_col: str - Column holding the daily stage
+        threshold: float - Stage at or above which a day counts as inundated
+    """
+
+    def __init__(self,
+                 wl_daily: pd.DataFrame,
+                 well_col: str = 'well_id',
+                 stage_col: str = 'water_level',
+                 threshold: float = 0.0):
+
+        codes, wells = pd.factorize(wl_daily[well_col], sort=True)
+        day = wl_daily['Date'].to_numpy(dtype='datetime64[D]').astype('int64')
+
+        order = np.lexsort((day, codes))
+        codes, day = codes[order], day[order]
+        inundated = wl_daily[stage_col].to_numpy(dtype=float)[order] >= threshold
+
+        self.wells = wells
+        self.min_day = int(day.min()) if len(day) else 0
+        # Offsets run 1..span-2 so a clipped split date stays inside its own well
+        self.span = (int(day.max()) - self.min_day + 3) if len(day) else 3
+
+        self.codes = codes
+        self.day = day
+        self.inundated = inundated
+        self.key = codes.astype('int64') * self.span + (day - self.min_day + 1)
+        self.cum_inundated = np.concatenate([[0], np.cumsum(inundated)])
+        self.bounds = np.searchsorted(codes, np.arange(len(wells) + 1))
+
+    def _day_key(self, code: np.ndarray, split_day: np.ndarray) -> np.ndarray:
+        offset = np.clip(split_day - self.min_day + 1, 0, self.span - 1)
+        return code * self.span + offset
+
+    def split_counts(self, well_ids, split_dates) -> pd.DataFrame:
+        """
+        Observation and inundation days strictly before and strictly after
+        each split date. Unknown wells and missing split dates give NaN.
+        """
+        well_ids = pd.Index(well_ids)
+        split = pd.to_datetime(pd.Series(split_dates)).to_numpy(dtype='datetime64[ns]')
+
+        code = self.wells.get_indexer(well_ids).astype('int64')
+        valid = (code >= 0) & ~np.isnat(split)
+        code = np.where(valid, code, 0)
+
+        # Dates are whole days: before a split means before its day's start
+        # (ceil), after it means after its day (floor)
+        split_floor = np.where(valid, split, np.datetime64(0, 'ns')).astype('datetime64[D]').astype('int64')
+        split_ceil = split_floor + (split.astype('datetime64[D]') != split)
+
+        counts = self._counts(code, split_floor, split_ceil)
+        counts.loc[~valid] = np.nan
+
+        return counts
+
+    def _counts(self,
+                code: np.ndarray,
+                split_floor: np.ndarray,
+                split_ceil: np.ndarray) -> pd.DataFrame:
+        """
+        Counts for known wells and integer split days (days since epoch)
+        """
+        start = self.bounds[code]
+        stop = self.bounds[code + 1] if len(self.wells) else start
+        pre_end = np.searchsorted(self.key, self._day_key(code, split_ceil), side='left')
+        post_start = np.searchsorted(self.key, self._day_key(code, split_floor), side='right')
+
+        return pd.DataFrame({
+            'pre_observation_days': pre_end - start,
+            'pre_inundation_days': self.cum_inundated[pre_end] - self.cum_inundated[start],
+            'post_observation_days': stop - post_start,
+            'post_inundation_days': self.cum_inundated[stop] - self.cum_inundated[post_start]
+        }, dtype=float)
+
+
+def _pti_from_counts(counts: pd.DataFrame) -> pd.DataFrame:
+    """
+    PTI (%) per period and the nominal and relative pre/post differences
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pre_pti = counts['pre_inundation_days'] / counts['pre_observation_days'] * 100
+        post_pti = counts['post_inundation_days'] / counts['post_observation_days'] * 100
+        pti_diff = post_pti - pre_pti
+        pti_relative_diff = pti_diff / ((post_pti + pre_pti) * 0.5) * 100
+
+    counts['pre_pti'] = pre_pti.where(counts['pre_observation_days'] > 0)
+    counts['post_pti'] = post_pti.where(counts['post_observation_days'] > 0)
+    counts['pti_diff'] = counts['post_pti'] - counts['pre_pti']
+    counts['pti_relative_diff'] = pti_relative_diff.where(np.isfinite(pti_relative_diff))
+
+    return counts
+
+
+def lai_split_dates(lai: pd.DataFrame) -> pd.Series:
+    """
+    The LAI change date, or the split date for wells without an observed change
+    """
+    return pd.to_datetime(lai['change_date']).where(
+        lai['change_direction'].notna(),
+        pd.to_datetime(lai['lai_split_date'])
+    )
+
+
+def calc_pti_stats(
+    wl_daily: pd.DataFrame,
+    well_ids,
+    split_dates,
+    well_col: str = 'well_id',
+    stage_col: str = 'water_level',
+    index: InundationIndex = None
+) -> pd.DataFrame:
+    """
+    PTI statistics for every (well, split date) pair in one pass.
+
+    Well ids may repeat, so many candidate split dates per well can be
+    evaluated in the same call. Pass a prebuilt InundationIndex to skip
+    sorting wl_daily again across calls.
+
+    Returns:
+        pd.DataFrame: One row per pair with well_id, split_date, pre/post
+            observation and inundation days, pre_pti, post_pti, pti_diff
+            and pti_relative_diff
+    """
+    if index is None:
+        index = InundationIndex(wl_daily, well_col=well_col, stage_col=stage_col)
+
+    stats = _pti_from_counts(index.split_counts(well_ids, split_dates))
+    stats.insert(0, 'split_date', pd.to_datetime(pd.Series(split_dates)).to_numpy())
+    stats.insert(0, 'well_id', np.asarray(well_ids))
+
+    return stats
+
+
+def pti_split_sweep(
+    wl_daily: pd.DataFrame,
+    well_ids=None,
+    center_dates=None,
+    window_months: int = None,
+    well_col: str = 'well_id',
+    stage_col: str = 'water_level',
+    index: InundationIndex = None
+) -> pd.DataFrame:
+    """
+    PTI statistics for every candidate split day of every well at once.
+
+    Without center_dates every day from a well's first to last observation
+    is a candidate. With center_dates (one per well id, e.g. the chosen LAI
+    change date) the result gains offset_days from that date, and
+    window_months restricts candidates to +/- that many months around it.
+    All candidates are evaluated against the prefix sums of one
+    InundationIndex, so there is no per-candidate filtering.
+
+    Returns:
+        pd.DataFrame: One row per (well, candidate split day), with the
+            calc_pti_stats columns (plus offset_days when centred)
+    """
+    if index is None:
+        index = InundationIndex(wl_daily, well_col=well_col, stage_col=stage_col)
+    if well_ids is None:
+        well_ids = index.wells
+
+    code = index.wells.get_indexer(pd.Index(well_ids)).astype('int64')
+    known = code >= 0
+    safe_code = np.where(known, code, 0)
+
+    # First and last observed day of each well
+    lo = index.day[index.bounds[safe_code]] if len(index.day) else np.zeros(len(code), dtype='int64')
+    hi = index.day[index.bounds[safe_code + 1] - 1] if len(index.day) else lo - 1
+    hi = np.where(known, hi, lo - 1)
+
+    center_day = None
+    if center_dates is not None:
+        center = pd.to_datetime(pd.Series(center_dates)).reset_index(drop=True)
+        center_day = center.to_numpy(dtype='datetime64[D]').astype('int64')
+        has_center = center.notna().to_numpy()
+
+        if window_months is not None:
+            # Missing centres are NaT (INT64_MIN), so they must not clamp
+            window = pd.DateOffset(months=window_months)
+            start = (center - window).to_numpy(dtype='datetime64[D]').astype('int64')
+            stop = (center + window).to_numpy(dtype='datetime64[D]').astype('int64')
+            lo = np.where(has_center, np.maximum(lo, start), lo)
+            hi = np.where(has_center, np.minimum(hi, stop), hi)
+
+        # Wells without a centre get no candidates
+        hi = np.where(has_center, hi, lo - 1)
+
+    # Expand each well's [lo, hi] day range into one flat candidate array
+    n_candidates = np.clip(hi - lo + 1, 0, None)
+    well_pos = np.repeat(np.arange(len(code)), n_candidates)
+    first_candidate = np.cumsum(n_candidates) - n_candidates
+    split_day = lo[well_pos] + (np.arange(n_candidates.sum()) - first_candidate[well_pos])
+
+    stats = _pti_from_counts(index._counts(code[well_pos], split_day, split_day))
+    if center_day is not None:
+        stats.insert(0, 'offset_days', split_day - center_day[well_pos])
+    stats.insert(0, 'split_date', split_day.astype('datetime64[D]').astype('datetime64[ns]'))
+    stats.insert(0, 'well_id', np.asarray(well_ids)[well_pos])
+
+    return stats
@@ -0,0 +1,147 @@
+"""
+Moving-block bootstrap of the stage vs. night-recession relationship in
+HcritResult.daily_wl. Consecutive recession days are autocorrelated, so
+days are resampled in blocks rather than one by one. All replicates are
+drawn as one (replicates, days) index matrix and the statistic is computed
+along axis 1, so thousands of replicates cost a few array passes.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def default_block_length(n: int) -> int:
+    """
+    n ** (1/3) rounded, the usual block length for a moving-block bootstrap
+    """
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def block_bootstrap_indices(
+    n: int,
+    n_boot: int,
+    block_length: int = None,
+    rng: np.random.Generator = None
+) -> np.ndarray:
+    """
+    Row indices of n_boot moving-block bootstrap replicates of n rows.
+
+    Each replicate concatenates blocks of block_length consecutive rows
+    starting at uniform random positions, cut to n rows.
+
+    Returns:
+        np.ndarray: (n_boot, n) int indices into the original rows
+    """
+    block_length = min(block_length or default_block_length(n), n)
+    rng = rng if rng is not None else np.random.default_rng()
+
+    n_blocks = -(-n // block_length)
+    starts = rng.integers(0, n - block_length + 1, size=(n_boot, n_blocks))
+    indices = starts[:, :, None] + np.arange(block_length)
+
+    return indices.reshape(n_boot, n_blocks * block_length)[:, :n]
+
+
+def batched_ols(x: np.ndarray, y: np.ndarray):
+    """
+    Intercept and slope of y on x for every row of (replicates, n) arrays
+
+    Rows where x doesn't vary get NaN.
+    """
+    x_mean = x.mean(axis=1, keepdims=True)
+    y_mean = y.mean(axis=1, keepdims=True)
+    dx = x - x_mean
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (dx * (y - y_mean)).sum(axis=1) / (dx * dx).sum(axis=1)
+    intercept = y_mean[:, 0] - slope * x_mean[:, 0]
+
+    return intercept, slope
+
+
+@dataclass
+class RecessionBootstrap:
+    """
+    Block-bootstrap result of the recession-rate vs. stage line.
+
+    Attributes:
+        ci: pd.DataFrame - 'intercept' and 'slope' rows with the estimate
+            and the lower and upper percentile bounds
+        band: pd.DataFrame - stage, fit, lower and upper of the line on a
+            stage grid (pointwise percentile band)
+        replicates: np.ndarray - (n_boot, 2) intercepts and slopes
+        block_length: int - Days per resampled block
+        level: float - Confidence level of the bounds
+    """
+    ci: pd.DataFrame
+    band: pd.DataFrame
+    replicates: np.ndarray
+    block_length: int
+    level: float
+
+
+def bootstrap_recession_line(
+    daily_wl: pd.DataFrame,
+    n_boot: int = 2000,
+    block_length: int = None,
+    level: float = 0.95,
+    stage_grid=None,
+    seed: int = 0
+) -> RecessionBootstrap:
+    """
+    Confidence intervals of the line recession rate = intercept + slope * stage.
+
+    Parameters:
+        daily_wl: pd.DataFrame - Filtered days from calc_wetland_hcrit
+            (Date, water_level, slope)
+        n_boot: int - Bootstrap replicates
+        block_length: int - Days per block, defaults to n ** (1/3)
+        level: float - Confidence level of the percentile intervals
+        stage_grid - Stages to evaluate the band at, defaults to 50 points
+            over the observed stage range
+        seed: int - Seed of the resampling, for reproducible intervals
+
+    Returns:
+        RecessionBootstrap
+    """
+    days = daily_wl.dropna(subset=['water_level', 'slope']).sort_values('Date')
+    stage = days['water_level'].to_numpy(dtype=float)
+    recession = days['slope'].to_numpy(dtype=float)
+    if len(stage) < 3:
+        raise ValueError(f"Need at least 3 recession days to bootstrap, got {len(stage)}")
+
+    block_length = min(block_length or default_block_length(len(stage)), len(stage))
+    indices = block_bootstrap_indices(len(stage), n_boot, block_length, np.random.default_rng(seed))
+
+    intercepts, slopes = batched_ols(stage[indices], recession[indices])
+    replicates = np.column_stack([intercepts, slopes])
+    estimate = np.concatenate(batched_ols(stage[None], recession[None]))
+
+    tails = [100 * (1 - level) / 2, 100 * (1 + level) / 2]
+    lower, upper = np.nanpercentile(replicates, tails, axis=0)
+    ci = pd.DataFrame(
+        {'estimate': estimate, 'lower': lower, 'upper': upper},
+        index=pd.Index(['intercept', 'slope'])
+    )
+
+    if stage_grid is None:
+        stage_grid = np.linspace(stage.min(), stage.max(), 50)
+    stage_grid = np.asarray(stage_grid, dtype=float)
+    lines = intercepts[:, None] + slopes[:, None] * stage_grid
+    band_lower, band_upper = np.nanpercentile(lines, tails, axis=0)
+    band = pd.DataFrame({
+        'stage': stage_grid,
+        'fit': estimate[0] + estimate[1] * stage_grid,
+        'lower': band_lower,
+        'upper': band_upper
+    })
+
+    return RecessionBootstrap(
+        ci=ci,
+        band=band,
+        replicates=replicates,
+        block_length=block_length,
+        level=level
+    )
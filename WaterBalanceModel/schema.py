@@ -0,0 +1,143 @@
+"""
+Compact in-memory dtypes for stage and climate tables: categorical site ids,
+the smallest integer type that holds the flags, float32 levels and climate
+values, and free-text notes moved to a side table. Applied at load time so
+multi-region records fit in memory alongside the model; computations that
+need float64 precision (regressions, cumulative sums) upcast on their own.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Stage columns and their compact dtypes; flags are downcast separately
+# because hourly flags are sums and may not fit in int8
+STAGE_DTYPES = {
+    'Site_ID': 'category',
+    'water_level': 'float32'
+}
+
+NOTES_COLUMNS = ['Date', 'Site_ID', 'notes']
+
+
+def infer_frequency(dates: pd.Series, site_ids: pd.Series = None) -> str:
+    """
+    Most common step between consecutive dates (within each site), e.g. 'h' or 'D'
+
+    Returns:
+        str: Offset alias of the step, None for fewer than two dates
+    """
+    frame = pd.DataFrame({'Date': dates.to_numpy(dtype='datetime64[ns]')})
+    if site_ids is not None:
+        frame['Site_ID'] = site_ids.to_numpy()
+        steps = frame.sort_values(['Site_ID', 'Date']).groupby('Site_ID', observed=True)['Date'].diff()
+    else:
+        steps = frame['Date'].drop_duplicates().sort_values().diff()
+
+    steps = steps[steps > pd.Timedelta(0)]
+    if steps.empty:
+        return None
+
+    step = steps.mode().iloc[0]
+    if step % pd.Timedelta(days=1) == pd.Timedelta(0):
+        # Whole days read as 'D' rather than '24h'
+        days = step // pd.Timedelta(days=1)
+        return 'D' if days == 1 else f'{days}D'
+    return pd.tseries.frequencies.to_offset(step).freqstr
+
+
+def split_notes(wl: pd.DataFrame):
+    """
+    Move the notes column of a stage table to a side table.
+
+    Returns:
+        wl: pd.DataFrame - The table without notes
+        notes: pd.DataFrame - Date, Site_ID and notes of the rows that have one
+    """
+    if 'notes' not in wl.columns:
+        return wl, pd.DataFrame(columns=NOTES_COLUMNS)
+
+    notes = wl.loc[wl['notes'].notna(), NOTES_COLUMNS].reset_index(drop=True)
+
+    return wl.drop(columns=['notes']), notes
+
+
+def compact_stage(wl: pd.DataFrame, frequency: str = None):
+    """
+    Stage table in compact dtypes, with notes split off.
+
+    The sampling frequency is kept in wl.attrs['frequency'], inferred from
+    the dates when not given.
+
+    Returns:
+        wl: pd.DataFrame - Date, Site_ID (category), water_level (float32),
+            flag (int8, or wider if the flags need it) and any other columns
+        notes: pd.DataFrame - Side table from split_notes
+    """
+    wl, notes = split_notes(wl)
+
+    dtypes = {col: dtype for col, dtype in STAGE_DTYPES.items() if col in wl.columns}
+    wl = wl.astype(dtypes)
+    if 'flag' in wl.columns:
+        wl['flag'] = pd.to_numeric(wl['flag'], downcast='integer')
+
+    if len(notes):
+        notes['Site_ID'] = notes['Site_ID'].astype(wl['Site_ID'].dtype)
+
+    wl.attrs['frequency'] = frequency or infer_frequency(wl['Date'], wl.get('Site_ID'))
+
+    return wl, notes
+
+
+def compact_climate(climate: pd.DataFrame, date_col: str = 'date', frequency: str = None) -> pd.DataFrame:
+    """
+    Climate table with float32 values and downcast integer columns.
+
+    Text columns are left alone; the date step is kept in
+    climate.attrs['frequency'] like compact_stage.
+    """
+    climate = climate.copy()
+
+    for col in climate.columns:
+        values = climate[col]
+        if pd.api.types.is_float_dtype(values):
+            climate[col] = values.astype('float32')
+        elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            climate[col] = pd.to_numeric(values, downcast='integer')
+
+    if date_col in climate.columns:
+        climate.attrs['frequency'] = frequency or infer_frequency(climate[date_col])
+
+    return climate
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame, *side_tables: pd.DataFrame) -> pd.DataFrame:
+    """
+    Resident memory of each column before and after compaction.
+
+    Side tables split off during compaction (e.g. notes) count towards the
+    compact total.
+
+    Returns:
+        pd.DataFrame: dtype and MB before and after per column, plus an
+            'Index', a 'side tables' and a 'total' row and the reduction ratio
+    """
+    def _mb(frame):
+        return frame.memory_usage(index=True, deep=True) / 2 ** 20
+
+    mb_before, mb_after = _mb(before), _mb(after)
+    side_mb = sum(float(_mb(table).sum()) for table in side_tables)
+
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'dtype_after': after.dtypes.astype(str),
+        'mb_before': mb_before,
+        'mb_after': mb_after
+    })
+    report = report.reindex(mb_before.index.union(mb_after.index, sort=False))
+    report.loc['side tables', ['mb_before', 'mb_after']] = [0.0, side_mb]
+    report.loc['total', ['mb_before', 'mb_after']] = [mb_before.sum(), mb_after.sum() + side_mb]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        report['reduction'] = report['mb_before'] / report['mb_after']
+
+    return report
@@ -0,0 +1,154 @@
+"""
+Hourly and daily stage aggregates shared across analyses. Aggregates are
+cached as Parquet datasets (partitioned like the stage store) keyed by the
+SHA-256 of the raw CSV, so reruns skip aggregation until the file changes.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from WaterBalanceModel.stage_store import (
+    STAGE_PARTITIONING,
+    _source_fingerprint,
+    ingest_stage_csv,
+    load_stage
+)
+
+# Aggregation per frequency, matching what the analysis scripts used:
+# hourly flags are summed (any flagged sample flags the hour), daily flags
+# keep the maximum
+AGGREGATIONS = {
+    'hourly': {'floor': 'h', 'agg': {'water_level': 'mean', 'flag': 'sum'}},
+    'daily': {'floor': 'D', 'agg': {'water_level': 'mean', 'flag': 'max'}}
+}
+
+_HASHES = '_hashes.json'
+
+
+def _join_notes(notes: pd.Series, period: pd.Series, site_id: pd.Series) -> pd.Series:
+    """
+    Comma-join the distinct notes of each period and site.
+
+    Empty notes are dropped and duplicates removed up front, so the join
+    only runs over groups that actually carry notes.
+    """
+    notes = pd.DataFrame({
+        'Date': period,
+        'Site_ID': site_id,
+        'notes': notes
+    }).dropna(subset=['notes']).drop_duplicates()
+
+    return notes.groupby(['Date', 'Site_ID'], sort=False, observed=True)['notes'].agg(', '.join)
+
+
+def aggregate_stage(wl: pd.DataFrame, frequency: str) -> pd.DataFrame:
+    """
+    Aggregate normalized stage rows to 'hourly' or 'daily' per Site_ID.
+
+    Daily aggregates also carry the distinct notes of the day, comma-joined.
+    """
+    if frequency not in AGGREGATIONS:
+        raise ValueError(f"Unknown frequency: {frequency}. Available frequencies: {list(AGGREGATIONS)}")
+
+    spec = AGGREGATIONS[frequency]
+    period = wl['Date'].dt.floor(spec['floor']).rename('Date')
+
+    aggregated = wl.groupby([period, wl['Site_ID']], observed=True)[list(spec['agg'])].agg(spec['agg'])
+
+    if frequency == 'daily' and 'notes' in wl.columns:
+        aggregated = aggregated.join(_join_notes(wl['notes'], period, wl['Site_ID']))
+
+    return aggregated.reset_index()
+
+
+def _content_hash(csv_path: str, cache_dir: str) -> str:
+    """
+    SHA-256 of the file, memoized against its size and modification time
+    """
+    fingerprint = _source_fingerprint(csv_path)
+    hashes_path = os.path.join(cache_dir, _HASHES)
+
+    hashes = {}
+    if os.path.exists(hashes_path):
+        with open(hashes_path) as f:
+            hashes = json.load(f)
+
+    known = hashes.get(fingerprint['source'])
+    if known is not None and known['size'] == fingerprint['size'] and known['mtime_ns'] == fingerprint['mtime_ns']:
+        return known['sha256']
+
+    sha = hashlib.sha256()
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+
+    hashes[fingerprint['source']] = {**fingerprint, 'sha256': sha.hexdigest()}
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(hashes_path, 'w') as f:
+        json.dump(hashes, f)
+
+    return sha.hexdigest()
+
+
+def load_stage_aggregate(
+    csv_path: str,
+    frequency: str,
+    store_dir: str,
+    cache_dir: str = None,
+    site_ids: list = None,
+    start=None,
+    end=None,
+    column_map: dict = None,
+    streaming: bool = False,
+    compact: bool = False
+) -> pd.DataFrame:
+    """
+    Hourly or daily aggregates of a raw stage CSV, computed once per file content.
+
+    On a cache miss the CSV is ingested into the stage store (if needed) and
+    every site is aggregated and written to the cache; later calls only read
+    the requested sites and date range back.
+
+    Parameters:
+        frequency: str - 'hourly' or 'daily'
+        store_dir: str - Stage store the CSV is ingested into
+        cache_dir: str - Where aggregates are kept, defaults to
+            <store_dir>_aggregates
+        site_ids, start, end - Passed to stage_store.load_stage
+        streaming: bool - On a cache miss, aggregate the CSV chunk by chunk
+            (stage_stream) instead of ingesting it into the store first, for
+            files too large to load at once
+        compact: bool - Return schema.compact_stage dtypes, without the
+            daily notes
+    """
+    cache_dir = cache_dir or f'{store_dir.rstrip("/")}_aggregates'
+    content_hash = _content_hash(csv_path, cache_dir)
+    aggregate_dir = os.path.join(cache_dir, f'{frequency}_{content_hash[:16]}')
+
+    if not os.path.exists(aggregate_dir):
+        if streaming:
+            # Imported here, stage_stream builds on this module
+            from WaterBalanceModel.stage_stream import stream_aggregate_csv
+            aggregated = stream_aggregate_csv(csv_path, frequency, column_map=column_map)
+        else:
+            ingest_stage_csv(csv_path, store_dir, column_map)
+            aggregated = aggregate_stage(load_stage(store_dir), frequency)
+        aggregated['year'] = aggregated['Date'].dt.year.astype('int32')
+
+        # Written beside the final path and moved in, so a partial write is never read
+        partial_dir = aggregate_dir + '.partial'
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        pq.write_to_dataset(
+            pa.Table.from_pandas(aggregated, preserve_index=False),
+            root_path=partial_dir,
+            partitioning=STAGE_PARTITIONING
+        )
+        os.replace(partial_dir, aggregate_dir)
+
+    return load_stage(aggregate_dir, site_ids=site_ids, start=start, end=end, compact=compact)
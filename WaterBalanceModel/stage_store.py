@@ -0,0 +1,168 @@
+"""
+Columnar stage-data store. Raw logger CSVs are ingested once into a Parquet
+dataset partitioned by Site_ID and year with normalized column names, and
+read back with predicate pushdown so a single site's date range only
+touches its own files.
+"""
+
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from WaterBalanceModel.schema import compact_stage, split_notes
+
+# Source column names -> store column names. Covers the Bradford
+# (waterlevel_offsets_tracked_*) and Delmarva (*_output.csv) exports.
+STAGE_COLUMN_MAP = {
+    'Timestamp': 'Date',
+    'Site_Name': 'Site_ID',
+    'waterLevel': 'water_level',
+    'revised_depth': 'water_level',
+    'Flag': 'flag'
+}
+
+# Explicit so numeric-looking site names are never inferred as integers
+STAGE_PARTITIONING = ds.partitioning(
+    pa.schema([('Site_ID', pa.string()), ('year', pa.int32())]),
+    flavor='hive'
+)
+
+_MANIFEST = '_ingest.json'
+
+
+def _source_fingerprint(csv_path: str) -> dict:
+    stat = os.stat(csv_path)
+    return {
+        'source': os.path.abspath(csv_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+
+
+def normalize_stage_columns(wl: pd.DataFrame, column_map: dict = None) -> pd.DataFrame:
+    """
+    Rename source columns to Date / Site_ID / water_level / flag and parse Date
+    """
+    wl = wl.rename(columns=column_map or STAGE_COLUMN_MAP)
+    wl['Date'] = pd.to_datetime(wl['Date'])
+    if 'flag' not in wl.columns:
+        wl['flag'] = 0
+
+    return wl
+
+
+def ingest_stage_csv(
+    csv_path: str,
+    store_dir: str,
+    column_map: dict = None,
+    overwrite: bool = False
+) -> bool:
+    """
+    Ingest a raw stage CSV into a Parquet dataset partitioned by Site_ID/year.
+
+    A manifest records the CSV's size and modification time, so calling this
+    again for an unchanged file is a no-op. A changed file replaces the store.
+
+    Returns:
+        bool: True if the CSV was (re)ingested, False if the store was current
+    """
+    fingerprint = _source_fingerprint(csv_path)
+    manifest_path = os.path.join(store_dir, _MANIFEST)
+
+    if not overwrite and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) == fingerprint:
+                return False
+
+    wl = normalize_stage_columns(pd.read_csv(csv_path), column_map)
+    wl['Site_ID'] = wl['Site_ID'].astype(str)
+    wl['year'] = wl['Date'].dt.year.astype('int32')
+    wl = wl.sort_values(['Site_ID', 'Date'])
+
+    if os.path.exists(store_dir):
+        shutil.rmtree(store_dir)
+
+    pq.write_to_dataset(
+        pa.Table.from_pandas(wl, preserve_index=False),
+        root_path=store_dir,
+        partitioning=STAGE_PARTITIONING
+    )
+
+    # Written last so an interrupted ingest is redone on the next call
+    with open(manifest_path, 'w') as f:
+        json.dump(fingerprint, f)
+
+    return True
+
+
+def load_stage(
+    store_dir: str,
+    site_ids: list = None,
+    start=None,
+    end=None,
+    columns: list = None,
+    compact: bool = False
+) -> pd.DataFrame:
+    """
+    Load stage rows from the store, reading only the matching partitions.
+
+    Parameters:
+        site_ids: list - Wells to load (a single Site_ID string is accepted),
+            defaults to all wells
+        start, end: Inclusive Date bounds, anything pd.Timestamp accepts
+        columns: list - Columns to read, defaults to all
+        compact: bool - Return schema.compact_stage dtypes. Notes are not
+            read then, load them separately with load_stage_notes
+
+    Returns:
+        pd.DataFrame: Stage rows sorted by Site_ID and Date
+    """
+    dataset = ds.dataset(store_dir, format='parquet', partitioning=STAGE_PARTITIONING)
+
+    predicate = None
+
+    def _and(expr):
+        return expr if predicate is None else predicate & expr
+
+    if site_ids is not None:
+        if isinstance(site_ids, str):
+            site_ids = [site_ids]
+        predicate = _and(ds.field('Site_ID').isin([str(site) for site in site_ids]))
+
+    # Year bounds prune whole partitions, Date bounds filter row groups
+    if start is not None:
+        start = pd.Timestamp(start)
+        predicate = _and((ds.field('year') >= start.year) & (ds.field('Date') >= start.to_pydatetime()))
+    if end is not None:
+        end = pd.Timestamp(end)
+        predicate = _and((ds.field('year') <= end.year) & (ds.field('Date') <= end.to_pydatetime()))
+
+    if columns is None and compact:
+        columns = [name for name in dataset.schema.names if name not in ('notes', 'year')]
+    if columns is not None:
+        columns = list(dict.fromkeys(['Date', 'Site_ID', *columns]))
+
+    wl = dataset.to_table(columns=columns, filter=predicate).to_pandas()
+    wl = wl.drop(columns=['year'], errors='ignore')
+    wl = wl.sort_values(['Site_ID', 'Date'], ignore_index=True)
+
+    if compact:
+        wl, _ = compact_stage(wl)
+
+    return wl
+
+
+def load_stage_notes(store_dir: str, site_ids: list = None, start=None, end=None) -> pd.DataFrame:
+    """
+    Notes side table (Date, Site_ID, notes) of the rows that have one, for
+    use with load_stage(compact=True)
+    """
+    wl = load_stage(store_dir, site_ids=site_ids, start=start, end=end, columns=['notes'])
+    _, notes = split_notes(wl)
+
+    return notes
@@ -0,0 +1,191 @@
+"""
+Streaming aggregation of raw logger CSVs. The file is read in chunks and
+each chunk is reduced to per-site, per-period partial sums; only the last
+(possibly incomplete) period of each site is carried into the next chunk,
+so peak memory depends on the chunk size and the number of sites, not on
+the length of the record.
+"""
+
+import numpy as np
+import pandas as pd
+
+from WaterBalanceModel.stage_aggregates import AGGREGATIONS
+from WaterBalanceModel.stage_store import STAGE_COLUMN_MAP, normalize_stage_columns
+
+_PARTIAL_COLUMNS = ['wl_sum', 'wl_count', 'flag']
+
+
+def iter_stage_chunks(
+    csv_path: str,
+    chunksize: int = 500_000,
+    column_map: dict = None,
+    columns=('Date', 'Site_ID', 'water_level', 'flag')
+):
+    """
+    Normalized stage rows of a raw CSV, chunksize rows at a time.
+
+    Only source columns that map to the requested store columns are parsed,
+    so free-text columns such as notes cost nothing unless asked for.
+    """
+    column_map = column_map or STAGE_COLUMN_MAP
+    wanted = set(columns)
+
+    reader = pd.read_csv(
+        csv_path,
+        chunksize=chunksize,
+        usecols=lambda name: column_map.get(name, name) in wanted
+    )
+    for chunk in reader:
+        chunk = normalize_stage_columns(chunk, column_map)
+        chunk['Site_ID'] = chunk['Site_ID'].astype(str)
+        yield chunk
+
+
+class StreamingAggregator:
+    """
+    Incremental equivalent of stage_aggregates.aggregate_stage.
+
+    Rows must be in time order within each site (sites may interleave),
+    as logger exports are; a row falling in a period that was already
+    emitted raises ValueError.
+
+    Parameters:
+        frequency: str - 'hourly' or 'daily'
+        drop_flagged: bool - Drop flag != 0 rows before aggregating. By
+            default flagged rows are aggregated like aggregate_stage does,
+            so a flagged sample flags its whole period
+    """
+
+    def __init__(self, frequency: str, drop_flagged: bool = False):
+        if frequency not in AGGREGATIONS:
+            raise ValueError(f"Unknown frequency: {frequency}. Available frequencies: {list(AGGREGATIONS)}")
+
+        spec = AGGREGATIONS[frequency]
+        self.floor = spec['floor']
+        self.flag_agg = spec['agg']['flag']
+        self.with_notes = frequency == 'daily'
+        self.drop_flagged = drop_flagged
+
+        # Partial sums of each site's open period, indexed by (Site_ID, Date)
+        self.carry = pd.DataFrame(
+            columns=_PARTIAL_COLUMNS,
+            index=pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([])], names=['Site_ID', 'Date'])
+        )
+        # Distinct notes of open periods, in order of appearance
+        self.carry_notes = {}
+        # Site_ID -> open period; earlier periods have been emitted
+        self.open_period = {}
+
+    def _partial(self, wl: pd.DataFrame) -> pd.DataFrame:
+        period = wl['Date'].dt.floor(self.floor).rename('Date')
+        return wl.groupby([wl['Site_ID'], period]).agg(
+            wl_sum=('water_level', 'sum'),
+            wl_count=('water_level', 'count'),
+            flag=('flag', self.flag_agg)
+        )
+
+    def _check_order(self, partial: pd.DataFrame):
+        first = partial.reset_index().groupby('Site_ID')['Date'].min()
+        opened = pd.Series(self.open_period, dtype='datetime64[ns]').reindex(first.index)
+        late = first < opened
+        if late.any():
+            raise ValueError(
+                f"Rows are not in time order for sites {list(first.index[late])}; "
+                "sort the file by Site_ID and Date or use aggregate_stage"
+            )
+
+    def _merge_notes(self, wl: pd.DataFrame):
+        notes = wl[['Site_ID', 'Date', 'notes']].dropna(subset=['notes'])
+        notes = notes.assign(Date=notes['Date'].dt.floor(self.floor)).drop_duplicates()
+        for key, group in notes.groupby(['Site_ID', 'Date'], sort=False)['notes']:
+            known = self.carry_notes.setdefault(key, [])
+            known.extend(note for note in group if note not in known)
+
+    def _finalize(self, partial: pd.DataFrame) -> pd.DataFrame:
+        out = partial.reset_index()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            water_level = out['wl_sum'].to_numpy(dtype=float) / out['wl_count'].to_numpy(dtype=float)
+
+        aggregated = pd.DataFrame({
+            'Date': out['Date'],
+            'Site_ID': out['Site_ID'],
+            'water_level': water_level,
+            'flag': out['flag'].astype('int64')
+        })
+        if self.with_notes:
+            keys = zip(out['Site_ID'], out['Date'])
+            aggregated['notes'] = [
+                ', '.join(notes) if notes else np.nan
+                for notes in (self.carry_notes.pop(key, None) for key in keys)
+            ]
+        return aggregated
+
+    def add(self, wl: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fold one chunk of normalized rows in.
+
+        Returns:
+            pd.DataFrame: Periods completed by this chunk, aggregate_stage columns
+        """
+        if self.drop_flagged:
+            wl = wl[wl['flag'] == 0]
+        if wl.empty:
+            return self._finalize(self.carry.iloc[:0])
+
+        partial = self._partial(wl)
+        self._check_order(partial)
+        if self.with_notes and 'notes' in wl.columns:
+            self._merge_notes(wl)
+
+        combined = partial
+        if len(self.carry):
+            combined = pd.concat([self.carry, partial]).groupby(level=['Site_ID', 'Date']).agg(
+                {'wl_sum': 'sum', 'wl_count': 'sum', 'flag': self.flag_agg}
+            )
+
+        # Each site's latest period may continue in the next chunk
+        sites = combined.index.get_level_values('Site_ID')
+        dates = combined.index.get_level_values('Date')
+        latest = dates.to_numpy() == pd.Series(dates).groupby(sites.to_numpy()).transform('max').to_numpy()
+
+        self.carry = combined[latest]
+        self.open_period.update(zip(
+            self.carry.index.get_level_values('Site_ID'),
+            self.carry.index.get_level_values('Date')
+        ))
+
+        return self._finalize(combined[~latest])
+
+    def finish(self) -> pd.DataFrame:
+        """
+        Emit the open periods of every site
+        """
+        final = self._finalize(self.carry)
+        self.carry = self.carry.iloc[:0]
+        return final
+
+
+def stream_aggregate_csv(
+    csv_path: str,
+    frequency: str,
+    chunksize: int = 500_000,
+    column_map: dict = None,
+    drop_flagged: bool = False
+) -> pd.DataFrame:
+    """
+    aggregate_stage of a raw CSV without ever holding the raw rows in memory.
+
+    Returns:
+        pd.DataFrame: Date, Site_ID, water_level, flag (and notes for
+            'daily'), sorted by Date then Site_ID like aggregate_stage
+    """
+    aggregator = StreamingAggregator(frequency, drop_flagged=drop_flagged)
+    columns = ['Date', 'Site_ID', 'water_level', 'flag'] + (['notes'] if frequency == 'daily' else [])
+
+    parts = [
+        aggregator.add(chunk)
+        for chunk in iter_stage_chunks(csv_path, chunksize, column_map, columns)
+    ]
+    parts.append(aggregator.finish())
+
+    return pd.concat(parts, ignore_index=True).sort_values(['Date', 'Site_ID'], ignore_index=True)
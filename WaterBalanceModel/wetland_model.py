@@ -6,6 +6,10 @@ import os
 # Import the calculation function
 # Note: The module name should match exactly the filename (without .py extension)
 from WaterBalanceModel.hydrograph_h_crit import calc_wetland_hcrit
+from WaterBalanceModel.dem_h_crit import calc_dem_hcrit
+from WaterBalanceModel.hypsometry import Hypsometry, calc_hypsometry
+from WaterBalanceModel.simulate import DEFAULT_PARAMETERS, SimulationResult, simulate_stage
+from WaterBalanceModel.profiling import NULL_PROFILER
 
 
 class WetlandModel:
@@ -21,34 +25,106 @@ class WetlandModel:
     def __init__(self,
                  stage_df: pd.DataFrame,
                  #climate_df: pd.DataFrame,
-                 #wetland_basin_gdf: gpd.GeoDataFrame,
                  Site_ID: str,
-                 source_dem_path: str):
+                 source_dem_path: str,
+                 wetland_basin_gdf: gpd.GeoDataFrame = None,
+                 profiler=NULL_PROFILER):
+        """
+        Parameters:
+            profiler: profiling.Profiler - Records per-phase times and counts
+                of everything this model computes; off by default
+        """
         
         # Store as instance variable
         self.site_id = Site_ID
-        #self.wetland_basin = wetland_basin_gdf[wetland_basin_gdf['Site_ID'] == Site_ID]
+        self.profiler = profiler
+        self.wetland_basin = None
+        if wetland_basin_gdf is not None:
+            self.wetland_basin = wetland_basin_gdf[wetland_basin_gdf['Site_ID'] == Site_ID]
         self.dem_path = source_dem_path
 
-        stage = stage_df[stage_df['Site_ID'] == Site_ID]
-        stage = stage[stage['flag'] == 0] 
-        stage = stage.sort_values('Date')
+        with profiler.phase('select_stage'):
+            stage = stage_df[stage_df['Site_ID'] == Site_ID]
+            stage = stage[stage['flag'] == 0] 
+            stage = stage.sort_values('Date')
         self.stage = stage
 
+    @classmethod
+    def from_store(cls,
+                   store_dir: str,
+                   Site_ID: str,
+                   source_dem_path: str,
+                   wetland_basin_gdf: gpd.GeoDataFrame = None,
+                   start=None,
+                   end=None,
+                   profiler=NULL_PROFILER):
+        """
+        Build the model from a Parquet stage store (see stage_store), reading
+        only this site's partitions within [start, end].
+        """
+        # Imported here so pyarrow is only needed when a store is used
+        from WaterBalanceModel.stage_store import load_stage
+
+        with profiler.phase('load_stage'):
+            stage = load_stage(
+                store_dir,
+                site_ids=[Site_ID],
+                start=start,
+                end=end,
+                columns=['water_level', 'flag']
+            )
+
+        return cls(stage, Site_ID, source_dem_path, wetland_basin_gdf, profiler)
+
+    def calc_hypsometry(self, step: float = 0.01, max_stage: float = None) -> Hypsometry:
+        """
+        Stage-area-volume table of the basin, read from the DEM once.
+
+        Parameters:
+            step: float - Stage spacing of the table (DEM units)
+            max_stage: float - Top of the table, defaults to the basin's relief
+        """
+        if self.wetland_basin is None or self.wetland_basin.empty:
+            raise ValueError(f"No basin polygon for {self.site_id}, pass wetland_basin_gdf")
+
+        with self.profiler.phase('hypsometry'):
+            self.hypsometry = calc_hypsometry(
+                Site_ID=self.site_id,
+                wetland_basin=self.wetland_basin,
+                dem_path=self.dem_path,
+                step=step,
+                max_stage=max_stage
+            )
+
+        return self.hypsometry
+
     def calc_hcrit(
             self,
             method: str,
-            evening_cut: int,
-            morning_cut: int,
-            stage_filter: float,
-            plot: bool = True
+            evening_cut: int = None,
+            morning_cut: int = None,
+            stage_filter: float = None,
+            plot: bool = True,
+            engine: str = "vectorized",
+            backend: str = "numpy",
+            regression: str = "ols",
+            n_boot: int = 0
     ):
         """
         Calculate the spill elevation (h_crit) for the wetland.
         
         Parameters:
-            method: str - Method to use for calculation ('hydrograph' or other methods)
+            method: str - 'hydrograph' (night recessions, needs the cuts and
+                stage_filter) or 'dem' (spill elevation of the basin, needs
+                wetland_basin_gdf and source_dem_path)
             plot: bool - Whether to display plots during calculation
+            engine: str - Night recession engine ('vectorized' or 'loop')
+            backend: str - Regression kernel ('numpy', 'numba' or 'auto'),
+                vectorized engine only
+            regression: str - Per-night fit, 'ols' or 'theil_sen'
+            n_boot: int - Bootstrap replicates of the hydrograph h_crit and
+                recession-line intervals (hcrit_result.h_crit_ci and
+                recession_ci), e.g. 1000; 0 skips them
         
         Returns:
             float: The calculated h_crit value
@@ -57,21 +133,134 @@ class WetlandModel:
         h_crit = None
         
         if method == "hydrograph":
-            h_crit = calc_wetland_hcrit(
+            if None in (evening_cut, morning_cut, stage_filter):
+                raise ValueError("The hydrograph method needs evening_cut, morning_cut and stage_filter")
+            self.hcrit_result = calc_wetland_hcrit(
                 Site_ID = self.site_id,
                 wetland_hydrograph = self.stage,
                 plot_hydrograph = plot, 
                 plot_stage_recession= plot,
                 evening_cut=evening_cut,
                 morning_cut=morning_cut,
-                stage_filter=stage_filter
+                stage_filter=stage_filter,
+                engine=engine,
+                backend=backend,
+                profiler=self.profiler,
+                regression=regression,
+                n_boot=n_boot
             )
+            h_crit = self.hcrit_result.h_crit
         elif method == "dem":
-            pass
+            if self.wetland_basin is None or self.wetland_basin.empty:
+                raise ValueError(f"No basin polygon for {self.site_id}, pass wetland_basin_gdf")
+            with self.profiler.phase('dem_spill'):
+                self.spill_result = calc_dem_hcrit(
+                    Site_ID=self.site_id,
+                    wetland_basin=self.wetland_basin,
+                    dem_path=self.dem_path
+                )
+            self.profiler.count('dem_cells_flooded', self.spill_result.n_flooded)
+            h_crit = self.spill_result.h_crit
         else: 
-            raise ValueError(f"Unknown method: {method}. Available methods: 'hydrograph', 'custom'")
+            raise ValueError(f"Unknown method: {method}. Available methods: 'hydrograph', 'dem'")
             
 
         self.h_crit = h_crit
-        
-        return h_crit
\ No newline at end of file
+
+        return h_crit
+
+    def update_hcrit(
+            self,
+            new_stage_df: pd.DataFrame,
+            state_dir: str,
+            evening_cut: int,
+            morning_cut: int,
+            stage_filter: float,
+            backend: str = "numpy",
+            regression: str = "ols",
+            n_boot: int = 0
+    ):
+        """
+        Hydrograph h_crit updated with newly downloaded stage rows only.
+
+        Night fits are kept under state_dir (see hcrit_incremental), so each
+        call only fits the nights the new rows complete. The first call for
+        a site fits whatever record it is given.
+
+        Parameters:
+            new_stage_df: pd.DataFrame - New stage rows (any sites, flagged
+                rows included), like stage_df
+            state_dir: str - Directory holding every site's stored fits
+            n_boot: int - Bootstrap replicates of the h_crit and
+                recession-line intervals, 0 to skip
+        """
+        # Imported here so pyarrow is only needed for incremental runs
+        from WaterBalanceModel.hcrit_incremental import update_wetland_hcrit
+
+        stage = new_stage_df[(new_stage_df['Site_ID'] == self.site_id) & (new_stage_df['flag'] == 0)]
+
+        self.hcrit_result = update_wetland_hcrit(
+            state_dir,
+            self.site_id,
+            stage.sort_values('Date'),
+            evening_cut=evening_cut,
+            morning_cut=morning_cut,
+            stage_filter=stage_filter,
+            backend=backend,
+            profiler=self.profiler,
+            regression=regression,
+            n_boot=n_boot
+        )
+        self.h_crit = self.hcrit_result.h_crit
+
+        return self.h_crit
+
+    def simulate(
+            self,
+            climate: pd.DataFrame,
+            h0: float = None,
+            h_crit=None,
+            backend: str = "numpy",
+            **params
+    ) -> SimulationResult:
+        """
+        Simulate daily stage from a climate table (see simulate.simulate_stage).
+
+        Parameters:
+            climate: pd.DataFrame - Daily 'date', 'precip' and 'pet' (mm),
+                e.g. from calc_PRISM_wtr_budget.py
+            h0: float - Initial stage, defaults to the observed daily mean
+                stage on the first climate date (0 if unobserved)
+            h_crit - Spill stage, defaults to the estimated self.h_crit
+            backend: str - 'numpy', 'numba' or 'auto'
+            params - et_scale, et_extinction, sy_soil, sy_ramp, leak; arrays
+                run one batch member per parameter set
+
+        Returns:
+            SimulationResult: (batch, time) arrays, dates set from climate
+        """
+        climate = climate.sort_values('date')
+        dates = pd.DatetimeIndex(climate['date'])
+
+        if h_crit is None:
+            h_crit = getattr(self, 'h_crit', None)
+            if h_crit is None:
+                raise ValueError("No h_crit: run calc_hcrit first or pass h_crit")
+
+        if h0 is None:
+            first_day = self.stage[self.stage['Date'].dt.floor('D') == dates[0]]
+            h0 = first_day['water_level'].mean() if not first_day.empty else 0.0
+
+        with self.profiler.phase('simulate'):
+            result = simulate_stage(
+                climate['precip'].to_numpy(dtype=float),
+                climate['pet'].to_numpy(dtype=float),
+                h0,
+                h_crit,
+                **{**DEFAULT_PARAMETERS, **params},
+                backend=backend
+            )
+        result.dates = dates
+        self.simulation = result
+
+        return result
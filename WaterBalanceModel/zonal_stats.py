@@ -0,0 +1,195 @@
+"""
+Offline per-basin zonal means of local PRISM rasters. Each basin's
+fractional pixel coverage is computed once into a sparse weight matrix;
+every day is then reduced to per-basin means with sparse products.
+"""
+
+from dataclasses import dataclass
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from scipy import sparse
+
+from WaterBalanceModel.climate import PRISM_VARIABLES, _read_band
+
+# PRISM variable -> column name used by the Earth Engine export
+PRISM_COLUMNS = {
+    'ppt': 'precip',
+    'tmean': 'temp',
+    'tmin': 'temp_min',
+    'tmax': 'temp_max'
+}
+
+
+@dataclass
+class ZonalWeights:
+    """
+    Sparse basin x pixel coverage weights over a raster window.
+
+    Attributes:
+        matrix: sparse.csr_matrix - (basins, window pixels) weights, the
+            covered fraction of each pixel times its relative area
+        basin_ids: np.ndarray - Basin id of each matrix row
+        window: rasterio.windows.Window - Raster window the pixels index into
+        transform: Affine - Transform of the window
+        shape: tuple - (rows, cols) of the window
+        crs: str - WKT of the raster CRS
+    """
+    matrix: sparse.csr_matrix
+    basin_ids: np.ndarray
+    window: object
+    transform: object
+    shape: tuple
+    crs: str
+
+
+def _coverage(geom, transform, shape, geographic: bool):
+    """
+    Flat pixel indices and fractional-area weights of one polygon
+    """
+    n_rows, n_cols = shape
+    inverse = ~transform
+    minx, miny, maxx, maxy = geom.bounds
+
+    # Pixel range touched by the polygon's bounds (north-up raster)
+    col0, row0 = inverse * (minx, maxy)
+    col1, row1 = inverse * (maxx, miny)
+    col0, row0 = max(int(np.floor(col0)), 0), max(int(np.floor(row0)), 0)
+    col1, row1 = min(int(np.ceil(col1)), n_cols), min(int(np.ceil(row1)), n_rows)
+    if col1 <= col0 or row1 <= row0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    rows, cols = np.meshgrid(np.arange(row0, row1), np.arange(col0, col1), indexing='ij')
+    rows, cols = rows.ravel(), cols.ravel()
+
+    x0 = transform.c + cols * transform.a
+    y0 = transform.f + rows * transform.e
+    cells = shapely.box(x0, y0 + transform.e, x0 + transform.a, y0)
+
+    cell_area = abs(transform.a * transform.e)
+    fraction = shapely.area(shapely.intersection(cells, geom)) / cell_area
+
+    weight = fraction
+    if geographic:
+        # Degree cells shrink towards the poles
+        weight = fraction * np.cos(np.radians(y0 + transform.e / 2))
+
+    keep = fraction > 0
+    return (rows * n_cols + cols)[keep], weight[keep]
+
+
+def build_zonal_weights(
+    basins: gpd.GeoDataFrame,
+    raster_path: str,
+    id_col: str = 'Site_ID'
+) -> ZonalWeights:
+    """
+    Fractional coverage weights of every basin on a raster's grid.
+
+    Only the window around the basins is indexed, so the weight matrix and
+    the daily reads scale with the study area, not the raster extent.
+    MultiPolygons are handled as single geometries.
+
+    Parameters:
+        basins: gpd.GeoDataFrame - Basin polygons (e.g. Final_Basins.shp)
+        raster_path: str - Any raster on the target grid
+        id_col: str - Column identifying each basin
+    """
+    import rasterio
+    from rasterio.windows import from_bounds
+
+    with rasterio.open(raster_path) as src:
+        basins = basins.to_crs(src.crs)
+        geographic = src.crs.is_geographic
+
+        # Window around all basins, padded a pixel and clipped to the raster
+        window = from_bounds(*basins.total_bounds, transform=src.transform)
+        window = window.round_offsets(op='floor').round_lengths(op='ceil')
+        col_off, row_off = max(int(window.col_off) - 1, 0), max(int(window.row_off) - 1, 0)
+        width = min(int(window.width) + 2, src.width - col_off)
+        height = min(int(window.height) + 2, src.height - row_off)
+        window = rasterio.windows.Window(col_off, row_off, width, height)
+
+        transform = src.window_transform(window)
+        crs = src.crs.to_wkt()
+
+    shape = (height, width)
+    rows, cols, weights = [], [], []
+    for i, geom in enumerate(basins.geometry):
+        if geom is None or geom.is_empty:
+            continue
+        pixels, weight = _coverage(geom, transform, shape, geographic)
+        rows.append(np.full(len(pixels), i))
+        cols.append(pixels)
+        weights.append(weight)
+
+    matrix = sparse.csr_matrix(
+        (np.concatenate(weights or [np.empty(0)]),
+         (np.concatenate(rows or [np.empty(0, int)]), np.concatenate(cols or [np.empty(0, int)]))),
+        shape=(len(basins), height * width)
+    )
+
+    return ZonalWeights(
+        matrix=matrix,
+        basin_ids=basins[id_col].to_numpy(),
+        window=window,
+        transform=transform,
+        shape=shape,
+        crs=crs
+    )
+
+
+def zonal_means(
+    rasters: pd.DataFrame,
+    weights: ZonalWeights,
+    variables=PRISM_VARIABLES,
+    chunk_days: int = 366
+) -> pd.DataFrame:
+    """
+    Area-weighted per-basin means of daily rasters.
+
+    Days are read in chunks into a (pixels, days) matrix and reduced with
+    two sparse products: weighted sums over valid pixels and the weights of
+    those valid pixels, so nodata cells are excluded from each basin's mean.
+
+    Parameters:
+        rasters: pd.DataFrame - Output of climate.find_prism_rasters
+        weights: ZonalWeights - From build_zonal_weights on the same grid
+
+    Returns:
+        pd.DataFrame: One row per date and basin with precip, temp,
+            temp_min and temp_max, matching the Earth Engine export columns
+    """
+    rasters = rasters.sort_index()
+    dates = pd.DatetimeIndex(rasters.index)
+    n_basins = len(weights.basin_ids)
+
+    columns = {}
+    for var in variables:
+        means = np.full((len(dates), n_basins), np.nan)
+        paths = rasters[var].to_numpy()
+
+        for start in range(0, len(dates), chunk_days):
+            chunk = paths[start:start + chunk_days]
+            stack = np.empty((weights.shape[0] * weights.shape[1], len(chunk)))
+            for j, path in enumerate(chunk):
+                if isinstance(path, str):
+                    stack[:, j] = _read_band(path, weights.window).ravel()
+                else:
+                    stack[:, j] = np.nan
+
+            valid = ~np.isnan(stack)
+            weighted = weights.matrix @ np.where(valid, stack, 0.0)
+            coverage = weights.matrix @ valid.astype(float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                means[start:start + len(chunk)] = (weighted / coverage).T
+
+        columns[PRISM_COLUMNS.get(var, var)] = means.ravel()
+
+    return pd.DataFrame({
+        'date': np.repeat(dates.values, n_basins),
+        'Site_ID': np.tile(weights.basin_ids, len(dates)),
+        **columns
+    })
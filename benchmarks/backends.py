@@ -0,0 +1,107 @@
+# %% 1.0 Libraries
+
+"""
+NumPy vs. Numba backends on synthetic multi-year data: the vectorized
+h_crit night fits on hourly stage and the batched water-balance
+simulation. Each comparison first asserts both backends give identical
+outputs.
+
+Run from the repository root with:
+    python -m benchmarks.backends
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from WaterBalanceModel.hydrograph_h_crit import calc_wetland_hcrit
+from WaterBalanceModel.kernels import numba
+from WaterBalanceModel.simulate import simulate_stage
+from benchmarks.synthetic import synthetic_stage
+
+# The synthetic wells spend much of the year below ground; fit every night
+# so the timings cover the whole record
+STAGE_FILTER = -np.inf
+
+# %% 2.0 Helpers
+
+def best_time(func, repeats: int = 3) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def hcrit(stage: pd.DataFrame, backend: str):
+    return calc_wetland_hcrit(
+        Site_ID='synthetic',
+        wetland_hydrograph=stage,
+        plot_hydrograph=False,
+        plot_stage_recession=False,
+        evening_cut=23,
+        morning_cut=5,
+        stage_filter=STAGE_FILTER,
+        backend=backend
+    )
+
+
+def simulation_inputs(years: int, n_batch: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    n_days = years * 365
+    days = np.arange(n_days)
+    return {
+        'precip': rng.gamma(0.3, 15, n_days),
+        'pet': 3 + 2 * np.sin(2 * np.pi * days / 365),
+        'h0': -0.3,
+        'h_crit': rng.uniform(0.05, 0.5, n_batch),
+        'et_scale': rng.uniform(0.5, 1.5, n_batch),
+        'sy_soil': rng.uniform(0.05, 0.3, n_batch),
+        'sy_ramp': rng.uniform(0.0, 0.3, n_batch),
+        'leak': 0.001
+    }
+
+# %% 3.0 Parity and timing
+
+def run(years: int = 10, n_batch: int = 10_000, repeats: int = 3) -> pd.DataFrame:
+
+    stage = synthetic_stage(years=years, interval='h')
+    stage = stage[stage['flag'] == 0]
+    sim_kwargs = simulation_inputs(years, n_batch)
+
+    # Compile outside the timings and check parity on the same inputs
+    reference = hcrit(stage, 'numpy').nights
+    compiled = hcrit(stage, 'numba').nights
+    pd.testing.assert_frame_equal(reference, compiled, check_exact=True)
+
+    reference = simulate_stage(**sim_kwargs, backend='numpy')
+    compiled = simulate_stage(**sim_kwargs, backend='numba')
+    for field in ['stage', 'et', 'discharge']:
+        np.testing.assert_array_equal(getattr(reference, field), getattr(compiled, field))
+
+    rows = []
+    for backend in ['numpy', 'numba']:
+        rows.append({
+            'benchmark': f'hcrit_{years}y_hourly',
+            'backend': backend,
+            'seconds': best_time(lambda: hcrit(stage, backend), repeats)
+        })
+        rows.append({
+            'benchmark': f'simulate_{years}y_{n_batch}_scenarios',
+            'backend': backend,
+            'seconds': best_time(lambda: simulate_stage(**sim_kwargs, backend=backend), repeats)
+        })
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    if numba is None:
+        raise SystemExit("numba is not installed, nothing to compare")
+
+    results = run()
+    print(results.pivot(index='benchmark', columns='backend', values='seconds').to_string())
+
+# %%
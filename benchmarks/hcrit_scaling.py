@@ -0,0 +1,70 @@
+# %% 1.0 Libraries
+
+"""
+Scaling benchmark for calc_wetland_hcrit on synthetic hourly stage data.
+
+Run from the repository root with:
+    python -m benchmarks.hcrit_scaling
+
+Runtime per year of record should stay flat from 1 to 10 years for both
+engines (linear scaling).
+"""
+
+import time
+
+import pandas as pd
+
+from WaterBalanceModel.hydrograph_h_crit import calc_wetland_hcrit
+from benchmarks.synthetic import synthetic_stage
+
+# The synthetic wells spend much of the year below ground; fit every night
+# so the timings cover the whole record
+STAGE_FILTER = float('-inf')
+
+# %% 2.0 Time both engines from 1 to 10 years
+
+def run(years_list=(1, 2, 4, 6, 8, 10), repeats: int = 3) -> pd.DataFrame:
+
+    rows = []
+    for years in years_list:
+        stage = synthetic_stage(years=years, interval='h')
+        stage = stage[stage['flag'] == 0]
+
+        for engine in ['loop', 'vectorized']:
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                calc_wetland_hcrit(
+                    Site_ID='synthetic',
+                    wetland_hydrograph=stage,
+                    plot_hydrograph=False,
+                    plot_stage_recession=False,
+                    evening_cut=23,
+                    morning_cut=5,
+                    stage_filter=STAGE_FILTER,
+                    engine=engine
+                )
+                timings.append(time.perf_counter() - start)
+
+            rows.append({
+                'engine': engine,
+                'years': years,
+                'rows': len(stage),
+                'seconds': min(timings),
+                'seconds_per_year': min(timings) / years
+            })
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    results = run()
+    print(results.to_string(index=False))
+
+    # Linear scaling keeps the 10-year / 1-year cost per year close to 1
+    for engine, timings in results.groupby('engine'):
+        per_year = timings.set_index('years')['seconds_per_year']
+        ratio = per_year.iloc[-1] / per_year.iloc[0]
+        print(f"{engine}: per-year cost ratio {per_year.index[-1]}y / {per_year.index[0]}y = {ratio:.2f}")
+
+# %%
@@ -0,0 +1,169 @@
+# %% 1.0 Libraries
+
+"""
+Timing and peak-memory benchmarks of the core computations on synthetic
+data, saved as JSON so runs can be compared for regressions.
+
+Run from the repository root with:
+    python -m benchmarks.suite --sites 20 --years 5 --out benchmarks/results/run.json
+    python -m benchmarks.suite --compare benchmarks/results/base.json benchmarks/results/run.json
+
+Peak memory is measured with tracemalloc in a separate run from the
+timings, so tracing overhead doesn't inflate them.
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from WaterBalanceModel.breakpoint import fit_breakpoint
+from WaterBalanceModel.climate import rolling_climate
+from WaterBalanceModel.hydrograph_h_crit import calc_wetland_hcrit
+from WaterBalanceModel.pti import calc_pti_stats, pti_split_sweep
+from WaterBalanceModel.stage_aggregates import aggregate_stage
+from benchmarks.synthetic import synthetic_climate, synthetic_stage
+
+# %% 2.0 Benchmark cases
+
+def build_cases(n_sites: int, years: int, interval: str, seed: int) -> dict:
+    """
+    Name -> (zero-argument callable, rows processed), on shared synthetic inputs
+    """
+    stage = synthetic_stage(n_sites, years, interval=interval, seed=seed)
+    unflagged = stage[stage['flag'] == 0]
+    one_site = unflagged[unflagged['Site_ID'] == unflagged['Site_ID'].iloc[0]]
+
+    wl_daily = aggregate_stage(stage, 'daily').rename(columns={'Site_ID': 'well_id'})
+    wells = wl_daily['well_id'].unique()
+    mid = wl_daily.groupby('well_id')['Date'].agg(lambda d: d.min() + (d.max() - d.min()) / 2)
+
+    climate = synthetic_climate(years * n_sites, seed=seed)
+
+    # The wettest site has the most positive-stage recession days
+    wettest = unflagged.groupby('Site_ID')['water_level'].median().idxmax()
+    recession_days = calc_wetland_hcrit(
+        Site_ID=wettest,
+        wetland_hydrograph=unflagged[unflagged['Site_ID'] == wettest],
+        plot_hydrograph=False,
+        plot_stage_recession=False,
+        evening_cut=23,
+        morning_cut=5,
+        stage_filter=-1,
+        n_boot=0
+    ).daily_wl
+
+    return {
+        'calc_wetland_hcrit': (lambda: calc_wetland_hcrit(
+            Site_ID='site_000',
+            wetland_hydrograph=one_site,
+            plot_hydrograph=False,
+            plot_stage_recession=False,
+            evening_cut=23,
+            morning_cut=5,
+            stage_filter=0
+        ), len(one_site)),
+        'aggregate_hourly': (lambda: aggregate_stage(stage, 'hourly'), len(stage)),
+        'aggregate_daily': (lambda: aggregate_stage(stage, 'daily'), len(stage)),
+        'calc_pti_stats': (lambda: calc_pti_stats(wl_daily, wells, mid.loc[wells].to_numpy()), len(wl_daily)),
+        'pti_split_sweep': (lambda: pti_split_sweep(wl_daily), len(wl_daily)),
+        'rolling_climate': (lambda: rolling_climate(climate, windows=[5, 10, 20], closed='both'), len(climate)),
+        'fit_breakpoint_1000': (lambda: fit_breakpoint(recession_days, n_boot=1000), len(recession_days) * 1000)
+    }
+
+
+def time_case(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_memory_mb(func) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2 ** 20
+
+# %% 3.0 Run, save and compare
+
+def run(n_sites: int = 10, years: int = 3, interval: str = 'h', seed: int = 0, repeats: int = 3) -> dict:
+
+    cases = build_cases(n_sites, years, interval, seed)
+
+    results = []
+    for name, (func, rows) in cases.items():
+        seconds = time_case(func, repeats)
+        results.append({
+            'name': name,
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_second': rows / seconds,
+            'peak_mb': peak_memory_mb(func)
+        })
+
+    return {
+        'config': {'sites': n_sites, 'years': years, 'interval': interval, 'seed': seed, 'repeats': repeats},
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor()
+        },
+        'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'results': results
+    }
+
+
+def compare(baseline_path: str, current_path: str) -> pd.DataFrame:
+    """
+    Per-benchmark time and peak-memory ratios (current / baseline)
+    """
+    frames = []
+    for label, path in [('baseline', baseline_path), ('current', current_path)]:
+        with open(path) as f:
+            frames.append(pd.DataFrame(json.load(f)['results']).set_index('name').add_prefix(f'{label}_'))
+
+    table = frames[0].join(frames[1], how='outer')
+    table['time_ratio'] = table['current_seconds'] / table['baseline_seconds']
+    table['memory_ratio'] = table['current_peak_mb'] / table['baseline_peak_mb']
+
+    return table[['baseline_seconds', 'current_seconds', 'time_ratio',
+                  'baseline_peak_mb', 'current_peak_mb', 'memory_ratio']]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sites', type=int, default=10)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--interval', default='h')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--out', default=None, help='JSON path for the results')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two saved result files instead of running')
+    args = parser.parse_args()
+
+    if args.compare:
+        print(compare(*args.compare).to_string(float_format='{:.3f}'.format))
+    else:
+        report = run(args.sites, args.years, args.interval, args.seed, args.repeats)
+        print(pd.DataFrame(report['results']).to_string(index=False, float_format='{:.3f}'.format))
+
+        if args.out:
+            os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+            with open(args.out, 'w') as f:
+                json.dump(report, f, indent=1)
+
+# %%
@@ -0,0 +1,107 @@
+"""
+Deterministic synthetic wetland data in the schemas the analyses expect, so
+benchmarks don't depend on the private CSVs under ./data/.
+
+Daily stage comes from the water-balance simulator driven by random rain
+pulses and seasonal PET, so it recedes, fills and is capped at each site's
+spill stage. It is then spread over the sampling interval with a daytime
+ET drawdown, sensor noise, gaps and flagged spikes.
+"""
+
+import numpy as np
+import pandas as pd
+
+from WaterBalanceModel.simulate import simulate_stage
+
+
+def synthetic_climate(years: int, seed: int = 0, start: str = '2015-01-01') -> pd.DataFrame:
+    """
+    Daily 'date', 'precip' (intermittent gamma pulses) and 'pet' (seasonal), in mm
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=years * 365, freq='D')
+    day = np.arange(len(dates))
+
+    rain_day = rng.random(len(dates)) < 0.3
+    precip = np.where(rain_day, rng.gamma(0.8, 12, len(dates)), 0.0)
+    pet = 3 + 2 * np.sin(2 * np.pi * (day - 80) / 365) + rng.normal(0, 0.3, len(dates))
+
+    return pd.DataFrame({'date': dates, 'precip': precip, 'pet': np.clip(pet, 0, None)})
+
+
+def _diurnal_fraction(day_fraction: np.ndarray) -> np.ndarray:
+    """
+    Share of a day's stage change reached by each time of day: mostly during
+    daylight (ET drawdown, 08:00-18:00), the rest spread evenly (seepage)
+    """
+    daylight = np.clip((day_fraction - 8 / 24) / (10 / 24), 0.0, 1.0)
+    return 0.3 * day_fraction + 0.7 * (1 - np.cos(np.pi * daylight)) / 2
+
+
+def synthetic_stage(
+    n_sites: int = 1,
+    years: int = 1,
+    interval: str = 'h',
+    seed: int = 0,
+    gaps_per_year: float = 2.0,
+    flag_fraction: float = 0.002,
+    start: str = '2015-01-01'
+) -> pd.DataFrame:
+    """
+    Stage table (Date, Site_ID, water_level, flag) for n_sites wells.
+
+    Parameters:
+        interval: str - Sampling interval, e.g. 'h' or '15min'
+        gaps_per_year: float - Mean number of sensor gaps (1-10 days) per site-year
+        flag_fraction: float - Share of rows flagged (flag=1) as spikes
+
+    The same seed always gives the same table.
+    """
+    rng = np.random.default_rng(seed)
+    climate = synthetic_climate(years, seed=seed, start=start)
+
+    h_crit = rng.uniform(0.1, 0.5, n_sites)
+    daily = simulate_stage(
+        climate['precip'].to_numpy(),
+        climate['pet'].to_numpy(),
+        h0=rng.uniform(-0.5, 0.0, n_sites),
+        h_crit=h_crit,
+        et_scale=rng.uniform(0.7, 1.3, n_sites),
+        sy_soil=rng.uniform(0.1, 0.3, n_sites),
+        sy_ramp=0.1,
+        leak=rng.uniform(0.0, 0.002, n_sites)
+    ).stage
+
+    dates = pd.date_range(start, periods=years * 365, freq='D')
+    times = pd.date_range(dates[0], dates[-1] + pd.Timedelta(days=1), freq=interval, inclusive='left')
+    day = ((times - dates[0]) // pd.Timedelta(days=1)).to_numpy()
+    day_fraction = ((times - times.normalize()) / pd.Timedelta(days=1)).to_numpy()
+
+    # Each sample sits between the previous day's end stage and its own day's
+    previous = np.concatenate([daily[:, :1], daily[:, :-1]], axis=1)
+    weight = _diurnal_fraction(day_fraction)
+    water_level = previous[:, day] + (daily[:, day] - previous[:, day]) * weight
+    water_level = np.minimum(water_level, h_crit[:, None])
+    water_level += rng.normal(0, 0.002, water_level.shape)
+
+    keep = np.ones(water_level.shape, dtype=bool)
+    samples_per_day = len(times) / len(dates)
+    n_gaps = rng.poisson(gaps_per_year * years, n_sites)
+    for site in range(n_sites):
+        starts = rng.integers(0, len(times), n_gaps[site])
+        lengths = (rng.uniform(1, 10, n_gaps[site]) * samples_per_day).astype(int)
+        for gap_start, length in zip(starts, lengths):
+            keep[site, gap_start:gap_start + length] = False
+
+    flag = (rng.random(water_level.shape) < flag_fraction).astype('int64')
+    water_level = water_level + flag * rng.uniform(0.2, 1.0, water_level.shape)
+
+    site_ids = np.array([f'site_{i:03d}' for i in range(n_sites)])
+    site_index, time_index = np.nonzero(keep)
+
+    return pd.DataFrame({
+        'Date': times.values[time_index],
+        'Site_ID': site_ids[site_index],
+        'water_level': water_level[keep],
+        'flag': flag[keep]
+    })
@@ -1,9 +1,10 @@
 # %% 1.0 Libraries and file paths
 
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 
+from WaterBalanceModel.climate import extraterrestrial_radiation, hargreaves_pet, rolling_climate
+
 prism_path = './data/PRISM_timeseries_Bradford.csv'
 prism = pd.read_csv(prism_path).drop(columns=['system:index', '.geo'])
 prism['date'] = pd.to_datetime(prism['date'])
@@ -13,39 +14,27 @@ prism['date'] = pd.to_datetime(prism['date'])
 # 2.0 Calculate extraterrestrial radiation with FAO-56 method
 
 # Constants
-Gsc = 0.0820  # Solar constant (MJ/m²/min)
 lat_deg = 29.94  # Latitude in degrees
-phi = np.radians(lat_deg)  # Convert to radians
 
 # 2.1 Calculate Julian day (day of year)
 prism['julian_day'] = prism['date'].dt.dayofyear
 
-# 2.2-2.5 Calculate solar parameters
-prism['delta'] = 0.409 * np.sin(2 * np.pi / 365 * prism['julian_day'] - 1.39)  # Solar declination
-prism['omega_s'] = np.arccos(-np.tan(phi) * np.tan(prism['delta']))  # Sunset hour angle
-prism['dr'] = 1 + 0.33 * np.cos(2 * np.pi / 365 * prism['julian_day'])  # Inverse relative Earth-Sun distance
-
-# 2.6 Calculate extraterrestrial radiation (Ra) in MJ/m²/day
-prism['Ra'] = (
-    (24 * 60 / np.pi) * Gsc * prism['dr'] * (
-        prism['omega_s'] * np.sin(phi) * np.sin(prism['delta']) + 
-        np.cos(phi) * np.cos(prism['delta']) * np.sin(prism['omega_s'])
-    )
-)
+# 2.2-2.6 Solar declination, sunset hour angle, Earth-Sun distance and
+# extraterrestrial radiation (Ra) in MJ/m²/day
+prism['Ra'] = extraterrestrial_radiation(prism['julian_day'], lat_deg)
 
 # %% 3.0 Calculate the PET with Hargreaves Method
 
 k = 0.0023 # Vegitation-specific coefficient
 k = 0.0023 * 0.4
 
-prism['pet'] = (
-    k * prism['Ra'] * (prism['temp'] + 17.8) * 
-    (prism['temp_max'] - prism['temp_min'])**0.5
+prism['pet'] = hargreaves_pet(
+    prism['Ra'], prism['temp'], prism['temp_max'], prism['temp_min'], k=k
 )
 
-prism.drop(columns=['temp_max', 'temp_min', 'delta', 'omega_s', 'dr', 'Ra'], inplace=True)
+prism.drop(columns=['temp_max', 'temp_min', 'Ra'], inplace=True)
 
-del k, Gsc, lat_deg, phi, 
+del k, lat_deg
 
 # plt.plot(prism['date'], prism['pet'])
 # plt.xlabel('Date')
@@ -64,21 +53,20 @@ del k, Gsc, lat_deg, phi,
 
 # %% 4.0 Calculate mean and cumulative PET and precip
 
-# PET rolling calculations
-prism['5d_mean_pet'] = prism['pet'].rolling(window=5, center=False, closed='both').mean()
-prism['5d_cum_pet'] = prism['pet'].rolling(window=5, center=False, closed='both').sum()
-prism['10d_mean_pet'] = prism['pet'].rolling(window=10, center=False, closed='both').mean()
-prism['10d_cum_pet'] = prism['pet'].rolling(window=10, center=False, closed='both').sum()
-prism['20d_mean_pet'] = prism['pet'].rolling(window=20, center=False, closed='both').mean()
-prism['20d_cum_pet'] = prism['pet'].rolling(window=20, center=False, closed='both').sum()
-
-# Precip rolling calculations
-prism['5d_mean_precip'] = prism['precip'].rolling(window=5, center=False, closed='both').mean()
-prism['5d_cum_precip'] = prism['precip'].rolling(window=5, center=False, closed='both').sum()
-prism['10d_mean_precip'] = prism['precip'].rolling(window=10, center=False, closed='both').mean()
-prism['10d_cum_precip'] = prism['precip'].rolling(window=10, center=False, closed='both').sum()
-prism['20d_mean_precip'] = prism['precip'].rolling(window=20, center=False, closed='both').mean()
-prism['20d_cum_precip'] = prism['precip'].rolling(window=20, center=False, closed='both').sum()
+# 5, 10 and 20-day means and sums of PET and precip, plus the cumulative
+# P - PET balances, from one cumulative-sum pass per variable. closed='both'
+# keeps the original rolling(window, closed='both') definition, where an
+# N-day window spans N + 1 daily values. float64 keeps the written CSV at
+# full precision (rolling_climate returns float32 by default).
+rolling = rolling_climate(
+    prism,
+    windows=[5, 10, 20],
+    variables=['pet', 'precip'],
+    balance=('precip', 'pet'),
+    closed='both',
+    dtype='float64'
+)
+prism = pd.concat([prism, rolling], axis=1)
 
 # Test plot to look at variability based on window sizes.
 
@@ -102,10 +90,8 @@ prism['20d_cum_precip'] = prism['precip'].rolling(window=20, center=False, close
 
 # %% 5.0 Calculate cummulative water balances
 
+# The 5, 10 and 20-day balances come from rolling_climate above
 prism['1d_balance'] = prism['precip'] - prism['pet']
-prism['5d_cum_balance'] = prism['5d_cum_precip'] - prism['5d_cum_pet']
-prism['10d_cum_balance'] = prism['10d_cum_precip'] - prism['10d_cum_pet']
-prism['20d_cum_balance'] = prism['20d_cum_precip'] - prism['20d_cum_pet']
 
 plt.plot(prism['date'], prism['20d_cum_balance'], color='orange', label='20-day cummulative P-PET')
 plt.plot(prism['date'], prism['20d_cum_precip'], color='blue', label='20-day cummulative P')
@@ -6,25 +6,21 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 
+from WaterBalanceModel.schema import compact_climate
+from WaterBalanceModel.stage_aggregates import load_stage_aggregate
+
 prism_path = './data/PRISM_water_balance.csv'
 water_level_path = './data/waterlevel_offsets_tracked_Spring2025.csv'
+store_dir = './data/stage_store/waterlevel_offsets_tracked_Spring2025'
 
 # %% 2.0 Read the data
 
 prism = pd.read_csv(prism_path)
 prism['date'] = pd.to_datetime(prism['date'])
-wl = pd.read_csv(water_level_path)
-wl['Date'] = pd.to_datetime(wl['Date'])
-
-# Aggregate hourly data to daily
-wl_daily = wl.groupby([wl['Date'].dt.date, 'Site_ID']).agg({
-    'revised_depth': 'mean',  # Mean water level for the day
-    'flag': 'max',           # Preserve flags (if any day hour has flag, keep it)
-    'notes': lambda x: ', '.join(x.dropna().unique()) if any(x.notna()) else None  # Combine notes
-}).reset_index()
-
-# Convert Date back to datetime
-wl_daily['Date'] = pd.to_datetime(wl_daily['Date'])
+prism = compact_climate(prism)
+# Daily mean stage, max flag and joined notes per well. Cached against the
+# CSV's content hash so reruns skip aggregation; revised_depth is water_level
+wl_daily = load_stage_aggregate(water_level_path, 'daily', store_dir)
 
 # %% 3.0 Filter for the site, clean merge with PRISM
 
@@ -34,7 +30,7 @@ clear_cut_date = pd.Timestamp('2023-06-17')
 wb_period = '10d_cum_balance'  # Can be changed to '5d_cum_balance', '20d_cum_balance', etc.
 
 test = wl_daily[wl_daily['Site_ID'] == site]
-test = test[['Date', 'revised_depth', 'flag', 'notes']]
+test = test[['Date', 'water_level', 'flag', 'notes']]
 test = test.sort_values('Date')
 
 # Create boolean column for pre/post logging
@@ -42,7 +38,7 @@ test['pre_logging'] = test['Date'] < clear_cut_date
 
 # %% 4.0
 
-plt.plot(test['Date'], test['revised_depth'])
+plt.plot(test['Date'], test['water_level'])
 plt.axvline(clear_cut_date, color='red', linestyle='--', label='Clear Cut')
 plt.legend()
 plt.ylabel('Stage (m)')
@@ -55,26 +51,26 @@ period_days = int(wb_period.split('d')[0])
 pre_log = test[test['pre_logging']]
 post_log = test[~test['pre_logging']]
 
-test['above_ground'] = test['revised_depth'] >= 0
+test['above_ground'] = test['water_level'] >= 0
 
 # %% 
 fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 6))
 
 # First subplot for stage data with KDE plots
 # Calculate KDE for pre and post logging data
-pre_kde = gaussian_kde(pre_log['revised_depth'].dropna())
-post_kde = gaussian_kde(post_log['revised_depth'].dropna())
+pre_kde = gaussian_kde(pre_log['water_level'].dropna())
+post_kde = gaussian_kde(post_log['water_level'].dropna())
 
 # Create x values for plotting
-x_stage = np.linspace(min(pre_log['revised_depth'].min(), post_log['revised_depth'].min()),
-                      max(pre_log['revised_depth'].max(), post_log['revised_depth'].max()),
+x_stage = np.linspace(min(pre_log['water_level'].min(), post_log['water_level'].min()),
+                      max(pre_log['water_level'].max(), post_log['water_level'].max()),
                       1000)
 
 # Plot KDE curves
 ax1.plot(x_stage * 1000, pre_kde(x_stage), color='green', label='Pre-logging', linewidth=2)
 ax1.plot(x_stage* 1000, post_kde(x_stage), color='tan', label='Post-logging', linewidth=2)
-ax1.axvline(pre_log['revised_depth'].mean() * 1000, color='green', linestyle='--', linewidth=2, label=f'Pre mean: {pre_log["revised_depth"].mean()*1000:.3f}')
-ax1.axvline(post_log['revised_depth'].mean() * 1000, color='tan', linestyle='--', linewidth=2, label=f'Post mean: {post_log["revised_depth"].mean()*1000:.3f}')
+ax1.axvline(pre_log['water_level'].mean() * 1000, color='green', linestyle='--', linewidth=2, label=f'Pre mean: {pre_log["water_level"].mean()*1000:.3f}')
+ax1.axvline(post_log['water_level'].mean() * 1000, color='tan', linestyle='--', linewidth=2, label=f'Post mean: {post_log["water_level"].mean()*1000:.3f}')
 ax1.set_xlabel('Stage (mm)')
 ax1.set_ylabel('Density')
 ax1.set_title('Water Level Distribution')
@@ -84,7 +80,7 @@ ax1.grid(axis='y', linestyle='--', alpha=0.7)
 # Second subplot for water balance data with KDE plots (will use the merged data later)
 test_wb = pd.merge(test, prism, how='left', left_on='Date', right_on='date')
 test_wb = test_wb[test_wb['flag'] == 0]
-test_wb['5d_depth_change'] = test_wb['revised_depth'].diff(periods=5) / 5
+test_wb['5d_depth_change'] = test_wb['water_level'].diff(periods=5) / 5
 pre_log_wb = test_wb[test_wb['pre_logging']]
 post_log_wb = test_wb[~test_wb['pre_logging']]
 
@@ -110,12 +106,12 @@ plt.tight_layout()
 
 # %%
 
-f_stat, p_val = stats.f_oneway(pre_log['revised_depth'],
-                               post_log['revised_depth'])
+f_stat, p_val = stats.f_oneway(pre_log['water_level'],
+                               post_log['water_level'])
 
 print('Stage ANOVA/Mann-Whitney Results')
 print(f'ANOVA p-value: {p_val:.5f}')
-u, p = stats.mannwhitneyu(pre_log['revised_depth'], post_log['revised_depth'], alternative='two-sided')
+u, p = stats.mannwhitneyu(pre_log['water_level'], post_log['water_level'], alternative='two-sided')
 print(f"Mann–Whitney U p = {p:.5f}")
 
 
@@ -141,7 +137,7 @@ post_data = test_wb_below[~test_wb_below['pre_logging']]
 # Plot each group separately with a label for the legend
 plt.scatter(
     x=pre_data['10d_cum_balance'], 
-    y=pre_data['revised_depth'], 
+    y=pre_data['water_level'], 
     color='red', 
     alpha=0.8,
     s=2,
@@ -149,7 +145,7 @@ plt.scatter(
 )
 plt.scatter(
     x=post_data['10d_cum_balance'], 
-    y=post_data['revised_depth'], 
+    y=post_data['water_level'], 
     color='blue', 
     alpha=0.8,
     s=2,
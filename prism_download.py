@@ -4,8 +4,17 @@ import ee
 import geemap
 import geopandas as gpd
 from shapely.geometry import box
+import shapely
+import json
+import os
 import pprint as pp
 
+import pandas as pd
+
+from WaterBalanceModel.basin_geometry import prepare_basins
+from WaterBalanceModel.climate import find_prism_rasters
+from WaterBalanceModel.climate_ingest import ingest_basin_climate
+
 ee.Initialize()
 ee.Authenticate()
 
@@ -19,15 +28,16 @@ bounds = bounds.to_crs('EPSG:4326')
 # %% 2.0 Functions
 
 def convert_gpd_geom_to_ee(geom, crs):
-
-    coords = list(geom.exterior.coords)
-    coords_list = [[x, y] for x, y in coords]
+    """
+    Shapely Polygon or MultiPolygon (holes included) to an ee.Geometry
+    """
+    geo_json = json.loads(shapely.to_geojson(geom))
     # For EPSG:4326, don't specify proj parameter (it's the default)
     if crs == 'EPSG:4326' or crs is None:
-        ee_poly = ee.Geometry.Polygon(coords_list)
+        ee_poly = ee.Geometry(geo_json)
     else:
         # For other CRS, convert to ee.Projection
-        ee_poly = ee.Geometry.Polygon(coords_list, proj=ee.Projection(crs))
+        ee_poly = ee.Geometry(geo_json, ee.Projection(crs))
     
     return ee_poly
 
@@ -87,6 +97,33 @@ ee_bounds = convert_gpd_geom_to_ee(bounds_geom, 'EPSG:4326')
 
 #export_prism_timeseries(start_date='2019-12-01', end_date='2025-05-01', geom=ee_bounds, scale=4_000)
 
+# %% 3.1 Offline per-basin PRISM means from local rasters
+
+# Area-weighted means for each basin (not one bounding-box average), from
+# daily PRISM rasters downloaded to disk. Edge cells are weighted by the
+# fraction of the cell inside the basin.
+prism_dir = './data/PRISM_daily'
+
+# Guarded so the ingest pool's workers don't re-run this cell on spawn platforms
+if __name__ == '__main__':
+    ppt_rasters = pd.Series(dtype=object)
+    if os.path.isdir(prism_dir):
+        ppt_rasters = find_prism_rasters(prism_dir)['ppt'].dropna()
+
+    if ppt_rasters.empty:
+        print(f'No daily PRISM ppt rasters under {prism_dir}, skipping the per-basin means')
+    else:
+        # Basins are reprojected and rasterized onto the PRISM grid once and cached
+        prism_grid = ppt_rasters.iloc[0]
+        prepared_basins = prepare_basins(bounds_path, prism_grid, './data/basin_geometry_cache')
+
+        # Months are ingested on a worker pool and recorded in a manifest, so a
+        # rerun after downloading a new month only processes that month
+        basin_prism = ingest_basin_climate(
+            prism_dir, prepared_basins.basins, './data/PRISM_basins', weights=prepared_basins.weights
+        )
+        basin_prism.to_csv('./data/PRISM_timeseries_basins.csv', index=False)
+
 # %% 4.0 Cumulative precip plot
 
 # Define your time interval
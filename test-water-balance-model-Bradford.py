@@ -1,45 +1,52 @@
 # %%
 
 import os
-import pandas as pd
 
 from WaterBalanceModel.wetland_model import WetlandModel
+from WaterBalanceModel.batch import run_hcrit_batch
+from WaterBalanceModel.stage_aggregates import load_stage_aggregate
 
 # main_dir = '/wetland_LAI_stage/'
 # os.chdir(main_dir)
 
 wl_path = './data/waterlevel_offsets_tracked_Spring2025.csv'
-wl = pd.read_csv(wl_path)
+store_dir = './data/stage_store/waterlevel_offsets_tracked_Spring2025'
 
-# %%
-wl = wl.rename(columns={'revised_depth': 'water_level'})
-wl['Date'] = pd.to_datetime(wl['Date'])
+# Every cell that does work is guarded: process-pool workers re-import this
+# script on spawn platforms and must not reload the stage or open plots
+if __name__ == '__main__':
+    # Hourly means per site, cached against the CSV's content hash so reruns
+    # skip both parsing and aggregation
+    wl_hourly = load_stage_aggregate(wl_path, 'hourly', store_dir, compact=True)
 
 # %%
 
-wl['hour'] = wl['Date'].dt.floor('h')
-
-wl_hourly = wl.groupby(['hour', 'Site_ID']).agg(
-    {'water_level': 'mean',
-     'flag': 'sum'}
-).reset_index()
-
-wl_hourly.rename(columns={'hour': 'Date'}, inplace=True)
+if __name__ == '__main__':
+    wbm = WetlandModel(
+        stage_df=wl_hourly,
+        Site_ID='3_638',
+        source_dem_path='TBD'
+    )
+
+    wbm.calc_hcrit(
+        method='hydrograph',
+        plot=True, 
+        stage_filter=0,
+        evening_cut=23,
+        morning_cut=5,
+        n_boot=1000
+    )
+
+# %% Batch h_crit for every well
+
+if __name__ == '__main__':
+    hcrit_summary, hcrit_daily, _ = run_hcrit_batch(
+        stage_df=wl_hourly,
+        evening_cut=23,
+        morning_cut=5,
+        stage_filter=0,
+        n_boot=1000
+    )
+    print(hcrit_summary)
 
 # %%
-
-wbm = WetlandModel(
-    stage_df=wl_hourly,
-    Site_ID='3_638',
-    source_dem_path='TBD'
-)
-
-wbm.calc_hcrit(
-    method='hydrograph',
-    plot=True, 
-    stage_filter=0,
-    evening_cut=23,
-    morning_cut=5
-)
-
-# %%
\ No newline at end of file
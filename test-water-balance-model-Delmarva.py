@@ -1,63 +1,65 @@
 # %% Libraries and File Paths
 
 import os
-import pandas as pd
 
 from WaterBalanceModel.wetland_model import WetlandModel
+from WaterBalanceModel.batch import run_hcrit_batch
+from WaterBalanceModel.stage_aggregates import load_stage_aggregate
 
 main_dir = 'D:/wetland_LAI_stage/'
 os.chdir(main_dir)
 
 wl_path = './data/20170918_20190422_output.csv'
-wl = pd.read_csv(wl_path)
-print(wl.columns)
+store_dir = './data/stage_store/20170918_20190422_output'
 
-# %%
-
-wl = wl.rename(
-    columns={'Timestamp': 'Date',
-             'Flag': 'flag',
-             'waterLevel': 'water_level',
-             'Site_Name': 'Site_ID'}
-)
-
-wl['flag'] = 0
+# Every cell that does work is guarded: process-pool workers re-import this
+# script on spawn platforms and must not reload the stage or open plots
+if __name__ == '__main__':
+    # Hourly means per site, cached against the CSV's content hash so reruns
+    # skip both parsing and aggregation. Columns come back normalized
+    # (Timestamp/Flag/waterLevel/Site_Name -> Date/flag/water_level/Site_ID)
+    wl_hourly = load_stage_aggregate(wl_path, 'hourly', store_dir, compact=True)
+    print(wl_hourly.columns)
 
 # %%
-#wl = wl.rename(columns={'revised_depth': 'water_level'})
-wl['Date'] = pd.to_datetime(wl['Date'])
-
-# %%
-
-wl['hour'] = wl['Date'].dt.floor('h')
-
-wl_hourly = wl.groupby(['hour', 'Site_ID']).agg(
-    {'water_level': 'mean',
-     'flag': 'sum'}
-).reset_index()
 
-wl_hourly.rename(columns={'hour': 'Date'}, inplace=True)
+if __name__ == '__main__':
+    wl_hourly['flag'] = 0
 
-# Is upland ET and hydro gradients still causing night-time recession
-# to be high at low water. 
-wl_hourly_low_ET = wl_hourly[
-    wl_hourly['Date'].dt.month.isin([10, 11, 12, 1, 2, 3])
-]
+    # Is upland ET and hydro gradients still causing night-time recession
+    # to be high at low water. 
+    wl_hourly_low_ET = wl_hourly[
+        wl_hourly['Date'].dt.month.isin([10, 11, 12, 1, 2, 3])
+    ]
 
 # %%
 
-wbm = WetlandModel(
-    stage_df=wl_hourly,
-    Site_ID='TI Wetland Well Shallow',
-    source_dem_path='TBD'
-)
-
-wbm.calc_hcrit(
-    method='hydrograph',
-    plot=True, 
-    stage_filter=0.15,
-    evening_cut=21,
-    morning_cut=8
-)
+if __name__ == '__main__':
+    wbm = WetlandModel(
+        stage_df=wl_hourly,
+        Site_ID='TI Wetland Well Shallow',
+        source_dem_path='TBD'
+    )
+
+    wbm.calc_hcrit(
+        method='hydrograph',
+        plot=True, 
+        stage_filter=0.15,
+        evening_cut=21,
+        morning_cut=8,
+        n_boot=1000
+    )
+
+# %% Batch h_crit for every well
+
+if __name__ == '__main__':
+    hcrit_summary, hcrit_daily, _ = run_hcrit_batch(
+        stage_df=wl_hourly,
+        evening_cut=21,
+        morning_cut=8,
+        stage_filter=0.15,
+        n_boot=1000
+    )
+    print(hcrit_summary)
 
 # %%